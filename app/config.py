@@ -1,7 +1,7 @@
 import os
+import socket
 from dotenv import load_dotenv
 from pathlib import Path
-from fastapi_mail import ConnectionConfig
 
 env_path = Path(".") / ".env"
 load_dotenv(dotenv_path=env_path)
@@ -12,7 +12,17 @@ POSTGRES_DB = os.getenv("POSTGRES_DB", "contacts_db")
 POSTGRES_HOST = os.getenv("POSTGRES_HOST", "localhost")
 POSTGRES_PORT = os.getenv("POSTGRES_PORT", "5432")
 
-DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
+DATABASE_URL = os.getenv(
+    "DATABASE_URL",
+    f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}",
+)
+
+# Налаштування пулу з'єднань з базою даних
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
 
 API_VERSION = os.getenv("API_VERSION", "v1")
 API_PREFIX = f"/api/{API_VERSION}"
@@ -20,15 +30,63 @@ API_PREFIX = f"/api/{API_VERSION}"
 # Налаштування JWT
 SECRET_KEY = os.getenv("SECRET_KEY", "your_secret_key_here")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+# Для асиметричних алгоритмів (RS256, ES256 тощо) токени підписуються приватним ключем,
+# а перевіряються публічним, тож інші сервіси можуть перевіряти токени без секрету.
+# Ключ задається у форматі PEM безпосередньо або шляхом до файлу (*_FILE)
+def _read_key(name: str):
+    path = os.getenv(f"{name}_FILE")
+    if path:
+        return Path(path).read_text()
+    return os.getenv(name)
+
+JWT_PRIVATE_KEY = _read_key("JWT_PRIVATE_KEY")
+JWT_PUBLIC_KEY = _read_key("JWT_PUBLIC_KEY")
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "4096"))
+JWT_CACHE_TTL = int(os.getenv("JWT_CACHE_TTL", "60"))
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
+TOKEN_DENYLIST_LOCAL_TTL = int(os.getenv("TOKEN_DENYLIST_LOCAL_TTL", "5"))
+
+# Налаштування хешування паролів
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", "16"))
 
 REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
 REDIS_PORT = os.getenv("REDIS_PORT", "6379")
+REDIS_DB = int(os.getenv("REDIS_DB", "0"))
+
+# Налаштування обмеження частоти запитів (формат "кількість/секунди")
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_LOCAL_FRACTION = int(os.getenv("RATE_LIMIT_LOCAL_FRACTION", "10"))
+RATE_LIMIT_LEASE_TTL = float(os.getenv("RATE_LIMIT_LEASE_TTL", "1"))
+RATE_LIMIT_LOGIN = os.getenv("RATE_LIMIT_LOGIN", "5/60")
+RATE_LIMIT_REGISTER = os.getenv("RATE_LIMIT_REGISTER", "3/60")
+RATE_LIMIT_REFRESH = os.getenv("RATE_LIMIT_REFRESH", "30/60")
+RATE_LIMIT_EMAIL_VERIFICATION = os.getenv("RATE_LIMIT_EMAIL_VERIFICATION", "10/60")
+RATE_LIMIT_USERS_ME = os.getenv("RATE_LIMIT_USERS_ME", "10/60")
+RATE_LIMIT_CONTACTS = os.getenv("RATE_LIMIT_CONTACTS", "600/60")
+
+# Налаштування кешу автентифікованого користувача
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "300"))
+USER_CACHE_LOCAL_TTL = int(os.getenv("USER_CACHE_LOCAL_TTL", "5"))
+USER_CACHE_LOCAL_SIZE = int(os.getenv("USER_CACHE_LOCAL_SIZE", "1024"))
+USER_CACHE_INVALIDATION_TTL = int(os.getenv("USER_CACHE_INVALIDATION_TTL", "5"))
 
 CLOUDINARY_CLOUD_NAME = os.getenv("CLOUDINARY_CLOUD_NAME")
 CLOUDINARY_API_KEY = os.getenv("CLOUDINARY_API_KEY")
 CLOUDINARY_API_SECRET = os.getenv("CLOUDINARY_API_SECRET")
 
+# Налаштування аватарів
+AVATAR_STORAGE = os.getenv("AVATAR_STORAGE", "cloudinary")
+AVATAR_LOCAL_DIR = os.getenv("AVATAR_LOCAL_DIR", "media/avatars")
+AVATAR_LOCAL_URL_PATH = os.getenv("AVATAR_LOCAL_URL_PATH", "/media/avatars")
+AVATAR_MAX_BYTES = int(os.getenv("AVATAR_MAX_BYTES", str(5 * 1024 * 1024)))
+AVATAR_MAX_PIXELS = int(os.getenv("AVATAR_MAX_PIXELS", str(40_000_000)))
+AVATAR_SIZE = int(os.getenv("AVATAR_SIZE", "256"))
+AVATAR_FORMAT = os.getenv("AVATAR_FORMAT", "webp")
+AVATAR_QUALITY = int(os.getenv("AVATAR_QUALITY", "85"))
+
 MAIL_USERNAME = os.getenv("MAIL_USERNAME")
 MAIL_PASSWORD = os.getenv("MAIL_PASSWORD")
 MAIL_FROM = os.getenv("MAIL_FROM")
@@ -40,19 +98,18 @@ MAIL_SSL_TLS = True
 USE_CREDENTIALS = True
 VALIDATE_CERTS = True
 
-# Конфігурація для fastapi-mail
-mail_config = ConnectionConfig(
-    MAIL_USERNAME=MAIL_USERNAME,
-    MAIL_PASSWORD=MAIL_PASSWORD,
-    MAIL_FROM=MAIL_FROM,
-    MAIL_PORT=MAIL_PORT,
-    MAIL_SERVER=MAIL_SERVER,
-    MAIL_FROM_NAME=MAIL_FROM_NAME,
-    MAIL_STARTTLS=MAIL_STARTTLS,
-    MAIL_SSL_TLS=MAIL_SSL_TLS,
-    USE_CREDENTIALS=USE_CREDENTIALS,
-    VALIDATE_CERTS=VALIDATE_CERTS,
-)
+MAIL_DEFAULT_LOCALE = os.getenv("MAIL_DEFAULT_LOCALE", "uk")
+
+# Налаштування черги вихідних листів
+MAIL_QUEUE_BATCH_SIZE = int(os.getenv("MAIL_QUEUE_BATCH_SIZE", "50"))
+MAIL_QUEUE_MAX_ATTEMPTS = int(os.getenv("MAIL_QUEUE_MAX_ATTEMPTS", "5"))
+MAIL_QUEUE_BACKOFF_SECONDS = int(os.getenv("MAIL_QUEUE_BACKOFF_SECONDS", "30"))
+MAIL_QUEUE_POLL_TIMEOUT = int(os.getenv("MAIL_QUEUE_POLL_TIMEOUT", "5"))
+# Кожен процес mail-worker має власний список листів в обробці, тому ідентифікатор
+# за замовчуванням унікальний для процесу; списки зупинених воркерів забирають інші
+# воркери, коли пульс (heartbeat) зупиненого воркера не оновлюється MAIL_WORKER_HEARTBEAT_TTL секунд
+MAIL_WORKER_ID = os.getenv("MAIL_WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+MAIL_WORKER_HEARTBEAT_TTL = int(os.getenv("MAIL_WORKER_HEARTBEAT_TTL", "60"))
 
 # Налаштування CORS
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
@@ -66,6 +123,43 @@ ORIGINS = [
 APP_BASE_URL = os.getenv("APP_BASE_URL", "http://localhost:8000")
 VERIFICATION_URL_PATH = os.getenv("VERIFICATION_URL_PATH", "/api/v1/auth/verify-email")
 
+# Налаштування масових операцій над контактами
+CONTACT_IMPORT_BATCH_SIZE = int(os.getenv("CONTACT_IMPORT_BATCH_SIZE", "1000"))
+CONTACT_IMPORT_MAX_ERRORS = int(os.getenv("CONTACT_IMPORT_MAX_ERRORS", "1000"))
+CONTACT_EXPORT_BATCH_SIZE = int(os.getenv("CONTACT_EXPORT_BATCH_SIZE", "1000"))
+CONTACT_BATCH_MAX_OPERATIONS = int(os.getenv("CONTACT_BATCH_MAX_OPERATIONS", "1000"))
+
+# Налаштування синхронізації змін контактів
+CONTACT_SYNC_PAGE_SIZE = int(os.getenv("CONTACT_SYNC_PAGE_SIZE", "1000"))
+CONTACT_SYNC_LAG_SECONDS = int(os.getenv("CONTACT_SYNC_LAG_SECONDS", "5"))
+CONTACT_TOMBSTONE_RETENTION_DAYS = int(os.getenv("CONTACT_TOMBSTONE_RETENTION_DAYS", "30"))
+
+# Налаштування щоденних дайджестів днів народження (app.workers.scheduler)
+BIRTHDAY_DIGEST_DAYS = int(os.getenv("BIRTHDAY_DIGEST_DAYS", "7"))
+BIRTHDAY_DIGEST_TIME = os.getenv("BIRTHDAY_DIGEST_TIME", "00:05")
+BIRTHDAY_DIGEST_EMAILS = os.getenv("BIRTHDAY_DIGEST_EMAILS", "false").lower() == "true"
+BIRTHDAY_DIGEST_WRITE_BATCH = int(os.getenv("BIRTHDAY_DIGEST_WRITE_BATCH", "1000"))
+
+# Налаштування кешу відповідей зі списками контактів
+CONTACT_RESPONSE_CACHE_ENABLED = os.getenv("CONTACT_RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+CONTACT_RESPONSE_CACHE_TTL = int(os.getenv("CONTACT_RESPONSE_CACHE_TTL", "300"))
+
+# Налаштування моніторингу
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "true").lower() == "true"
+READINESS_TIMEOUT = float(os.getenv("READINESS_TIMEOUT", "2"))
+
+# Налаштування production-сервера (python -m app.server)
+SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+# 0 - кількість воркерів визначається за кількістю доступних ядер процесора
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", os.getenv("WEB_CONCURRENCY", "0")))
+SERVER_KEEP_ALIVE = int(os.getenv("SERVER_KEEP_ALIVE", "75"))
+SERVER_BACKLOG = int(os.getenv("SERVER_BACKLOG", "2048"))
+SERVER_GRACEFUL_TIMEOUT = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))
+SERVER_ACCESS_LOG = os.getenv("SERVER_ACCESS_LOG", "false").lower() == "true"
+FORWARDED_ALLOW_IPS = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
 # Налаштування додатку
 APP_NAME = "Contacts API"
 APP_DESCRIPTION = "REST API для зберігання та управління контактами"
@@ -1,21 +1,75 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Depends
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.staticfiles import StaticFiles
+from pathlib import Path
 import cloudinary
-import redis.asyncio as redis
 import uvicorn
+from sqlalchemy import text
 
 from app.config import APP_NAME, APP_DESCRIPTION, API_PREFIX, ORIGINS
 from app.config import CLOUDINARY_CLOUD_NAME, CLOUDINARY_API_KEY, CLOUDINARY_API_SECRET
-from app.database.db import engine, Base
+from app.config import AVATAR_STORAGE, AVATAR_LOCAL_DIR, AVATAR_LOCAL_URL_PATH
+from app.config import METRICS_ENABLED, SERVER_TIMING_ENABLED, READINESS_TIMEOUT, RATE_LIMIT_ENABLED
+from app.database.db import engine, get_pool_status
 from app.routes import contacts, auth, users
-from app.utils.rate_limiter import setup_limiter
+from app.utils.auth import start_password_hashing, stop_password_hashing
+from app.utils.avatars import AVATAR_MAX_REQUEST_BYTES
+from app.utils.metrics import MetricsMiddleware, render_metrics
+from app.utils.rate_limiter import release_leases_periodically
+from app.utils.redis_client import redis_client, close_redis
+from app.utils.request_limits import RequestBodyLimitMiddleware
+from app.utils.templates import preload_email_templates
+from app.utils.tokens import get_token_cache_status
+
+logger = logging.getLogger(__name__)
+
+
+async def _open_connections():
+    # Перше з'єднання з базою даних та Redis відкривається під час старту воркера,
+    # а не на першому запиті; недоступність сервісів не зупиняє старт (див. /health/ready)
+    for name, check in (("database", _check_database), ("redis", _check_redis)):
+        try:
+            await asyncio.wait_for(check(), READINESS_TIMEOUT)
+        except Exception as e:
+            logger.warning("Не вдалося відкрити з'єднання %s під час старту: %r", name, e)
+
+
+# Схема бази даних створюється окремим кроком міграції (alembic upgrade head),
+# а не під час імпорту. Тут лише ініціалізуються та звільняються ресурси процесу.
+# Воркери uvicorn запускаються як окремі процеси (spawn) і нічого не успадковують:
+# кожен створює власні пул з'єднань та клієнт Redis під час імпорту модулів
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    preload_email_templates()
+    start_password_hashing()
+    await _open_connections()
+    # Невикористані дозволи обмежувача частоти повертаються в Redis після завершення оренди
+    lease_releaser = asyncio.create_task(release_leases_periodically()) if RATE_LIMIT_ENABLED else None
+    yield
+    if lease_releaser is not None:
+        lease_releaser.cancel()
+        await asyncio.gather(lease_releaser, return_exceptions=True)
+    await engine.dispose()
+    await close_redis()
+    stop_password_hashing()
 
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title=APP_NAME,
     description=APP_DESCRIPTION,
     version="0.1.0",
+    lifespan=lifespan,
+)
+
+# Обмеження розміру завантажень до розбору multipart-форми
+app.add_middleware(
+    RequestBodyLimitMiddleware,
+    limits={f"{API_PREFIX}/users/me/avatar": AVATAR_MAX_REQUEST_BYTES},
 )
 
 # Додавання CORS middleware
@@ -25,8 +79,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, server_timing=SERVER_TIMING_ENABLED)
+
 if all([CLOUDINARY_CLOUD_NAME, CLOUDINARY_API_KEY, CLOUDINARY_API_SECRET]):
     cloudinary.config(
         cloud_name=CLOUDINARY_CLOUD_NAME,
@@ -35,6 +93,11 @@ if all([CLOUDINARY_CLOUD_NAME, CLOUDINARY_API_KEY, CLOUDINARY_API_SECRET]):
         secure=True
     )
 
+# Локальне сховище аватарів (для розробки та тестів без Cloudinary)
+if AVATAR_STORAGE == "local":
+    Path(AVATAR_LOCAL_DIR).mkdir(parents=True, exist_ok=True)
+    app.mount(AVATAR_LOCAL_URL_PATH, StaticFiles(directory=AVATAR_LOCAL_DIR), name="avatars")
+
 app.include_router(
     auth.router,
     prefix=f"{API_PREFIX}/auth",
@@ -65,11 +128,53 @@ def health_check():
     return {"status": "ok"}
 
 
-# Ініціалізація обмежувача частоти запитів
-@app.on_event("startup")
-async def startup():
-    await setup_limiter()
+async def _check_database():
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+
+async def _check_redis():
+    await redis_client.ping()
+
+
+# Готовність приймати трафік: реальні запити до Postgres та Redis з обмеженням часу
+@app.get("/health/ready", tags=["health"])
+async def readiness_check():
+    checks = {"database": _check_database, "redis": _check_redis}
+    results = await asyncio.gather(
+        *(asyncio.wait_for(check(), READINESS_TIMEOUT) for check in checks.values()),
+        return_exceptions=True,
+    )
+    report = {
+        name: "ok" if not isinstance(result, BaseException) else f"error: {type(result).__name__}"
+        for name, result in zip(checks, results)
+    }
+    ready = all(value == "ok" for value in report.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ok" if ready else "unavailable", "checks": report},
+    )
+
+
+# Метрики у текстовому форматі Prometheus
+@app.get("/metrics", tags=["health"], include_in_schema=False)
+def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+# Стан пулу з'єднань з базою даних
+@app.get("/health/db-pool", tags=["health"])
+def db_pool_status():
+    return get_pool_status()
+
+
+# Кеш перевірених JWT: розмір і лічильники влучань/промахів
+@app.get("/health/token-cache", tags=["health"])
+def token_cache_status():
+    return get_token_cache_status()
 
 
+# Для розробки: python -m app.main (один процес з перезапуском при змінах коду).
+# У production використовується python -m app.server
 if __name__ == "__main__":
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
@@ -1,11 +1,33 @@
-from sqlalchemy import Column, Integer, String, Date, Text, ForeignKey, DateTime, func
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Date, Text, ForeignKey, DateTime, Index, DDL, event, func, literal_column
+from sqlalchemy.orm import relationship, validates
 
 from app.database.db import Base
 
 
+def birthday_month_day(value):
+    return value.month * 100 + value.day
+
+
 class Contact(Base):
     __tablename__ = "contacts"
+    __table_args__ = (
+        # Індекс для курсорної пагінації у порядку (прізвище, ім'я, id)
+        Index("ix_contacts_user_name_id", "user_id", "last_name", "first_name", "id"),
+        # Індекс для пошуку найближчих днів народження за (місяць, день)
+        Index("ix_contacts_user_birthday_md", "user_id", "birthday_md"),
+        # Індекс для синхронізації змін від заданого моменту
+        Index("ix_contacts_user_updated_at", "user_id", "updated_at", "id"),
+        # Триграмні GIN-індекси для пошуку за підрядком (ILIKE '%...%') у Postgres
+        *(
+            Index(
+                f"ix_contacts_{column}_trgm",
+                column,
+                postgresql_using="gin",
+                postgresql_ops={column: "gin_trgm_ops"},
+            ).ddl_if(dialect="postgresql")
+            for column in ("first_name", "last_name", "email")
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     first_name = Column(String(50), nullable=False)
@@ -13,13 +35,45 @@ class Contact(Base):
     email = Column(String(100), index=True, nullable=False)
     phone_number = Column(String(20), nullable=False)
     birthday = Column(Date, nullable=False)
+    # Місяць і день народження у вигляді MMDD, наприклад 1231 для 31 грудня
+    birthday_md = Column(Integer, nullable=False)
     additional_data = Column(Text, nullable=True)
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    # Версія рядка, збільшується при кожному оновленні (використовується для ETag)
+    version = Column(Integer, nullable=False, default=1, server_default="1", onupdate=literal_column("version + 1"))
 
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
 
     user = relationship("User", back_populates="contacts")
 
+    @validates("birthday")
+    def validate_birthday(self, key, value):
+        self.birthday_md = birthday_month_day(value)
+        return value
+
     def __repr__(self):
         return f"<Contact {self.first_name} {self.last_name}>"
+
+
+class ContactTombstone(Base):
+    __tablename__ = "contact_tombstones"
+    __table_args__ = (
+        # Індекс для сторінок видалень у порядку (час видалення, id контакту)
+        Index("ix_contact_tombstones_user_deleted_at_contact", "user_id", "deleted_at", "contact_id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    contact_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    deleted_at = Column(DateTime, nullable=False, default=func.now())
+
+    def __repr__(self):
+        return f"<ContactTombstone {self.contact_id}>"
+
+
+event.listen(
+    Contact.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
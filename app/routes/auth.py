@@ -1,33 +1,56 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Query
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
-from jose import jwt, JWTError
+from jose import JWTError
+from redis.exceptions import RedisError
 
 from app.database.db import get_db
 from app.models.user import User
-from app.schemas.user import UserCreate, UserResponse, Token, EmailSchema
-from app.utils.auth import authenticate_user, create_access_token, get_password_hash, get_current_user
+from app.schemas.user import UserCreate, UserResponse, Token, EmailSchema, RefreshTokenRequest
+from app.utils.auth import authenticate_user, create_access_token, create_refresh_token, get_password_hash
+from app.utils.auth import get_current_user, decode_token, credentials_exception, oauth2_scheme
+from app.utils.auth import session_store_unavailable
+from app.utils.cache import invalidate_user
 from app.utils.email import create_email_verification_token, send_verification_email
-from app.config import ACCESS_TOKEN_EXPIRE_MINUTES, SECRET_KEY, ALGORITHM
+from app.utils.templates import resolve_locale
+from app.utils.tokens import decode_jwt
+from app.utils.rate_limiter import IPRateLimit
+from app.utils.token_denylist import new_token_id, start_refresh_family, rotate_refresh_token
+from app.utils.token_denylist import revoke_access_token, revoke_refresh_family
+from app.config import ACCESS_TOKEN_EXPIRE_MINUTES
+from app.config import RATE_LIMIT_LOGIN, RATE_LIMIT_REGISTER, RATE_LIMIT_REFRESH, RATE_LIMIT_EMAIL_VERIFICATION
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+email_verification_limit = IPRateLimit("email_verification", RATE_LIMIT_EMAIL_VERIFICATION)
+
 
-@router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/register",
+    response_model=UserResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(IPRateLimit("register", RATE_LIMIT_REGISTER))],
+)
 async def register_user(
         user: UserCreate,
-        background_tasks: BackgroundTasks,
-        db: Session = Depends(get_db)
+        request: Request,
+        db: AsyncSession = Depends(get_db)
 ):
-    existing_user = db.query(User).filter(User.email == user.email).first()
+    result = await db.execute(select(User).where(User.email == user.email))
+    existing_user = result.scalars().first()
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Користувач з такою електронною адресою вже існує"
         )
 
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash(user.password)
 
     db_user = User(
         username=user.username,
@@ -37,27 +60,32 @@ async def register_user(
     )
 
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
 
     verification_token = create_email_verification_token(db_user.email)
 
-    await send_verification_email(
-        email=db_user.email,
-        username=db_user.username,
-        token=verification_token,
-        background_tasks=background_tasks
-    )
+    # Обліковий запис уже створено: якщо лист не вдалося поставити в чергу,
+    # користувач повторно запросить його через /request-email-verification
+    try:
+        await send_verification_email(
+            email=db_user.email,
+            username=db_user.username,
+            token=verification_token,
+            locale=resolve_locale(request.headers.get("accept-language"))
+        )
+    except RedisError:
+        logger.exception("Не вдалося поставити в чергу лист верифікації для користувача %s", db_user.id)
 
     return db_user
 
 
-@router.post("/login", response_model=Token)
+@router.post("/login", response_model=Token, dependencies=[Depends(IPRateLimit("login", RATE_LIMIT_LOGIN))])
 async def login_for_access_token(
         form_data: OAuth2PasswordRequestForm = Depends(),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db)
 ):
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -65,18 +93,67 @@ async def login_for_access_token(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # Кожен вхід відкриває нове сімейство refresh-токенів (окрема сесія користувача)
+    family = new_token_id()
+    refresh_jti = new_token_id()
+    try:
+        await start_refresh_family(family, refresh_jti)
+    except RedisError:
+        raise session_store_unavailable()
+
+    return issue_tokens(user.email, family, refresh_jti)
+
+
+@router.post("/refresh", response_model=Token, dependencies=[Depends(IPRateLimit("refresh", RATE_LIMIT_REFRESH))])
+async def refresh_access_token(body: RefreshTokenRequest):
+    payload = decode_token(body.refresh_token, "refresh_token")
+    family = payload.get("fam")
+    old_jti = payload.get("jti")
+    if not family or not old_jti:
+        raise credentials_exception()
+
+    new_jti = new_token_id()
+    try:
+        rotated = await rotate_refresh_token(family, old_jti, new_jti)
+        if rotated == 0:
+            # Повторне використання вже заміненого токена: ймовірно, його викрадено,
+            # тому відкликаємо всю сесію разом з уже виданими access-токенами
+            await revoke_refresh_family(family)
+    except RedisError:
+        raise session_store_unavailable()
+    if rotated <= 0:
+        raise credentials_exception()
+
+    return issue_tokens(payload["sub"], family, new_jti)
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(token: str = Depends(oauth2_scheme)):
+    payload = decode_token(token, "access_token")
+    # Вихід не підтверджується, доки токени не відкликано
+    try:
+        if payload.get("jti"):
+            await revoke_access_token(payload["jti"], payload["exp"])
+        if payload.get("fam"):
+            await revoke_refresh_family(payload["fam"])
+    except RedisError:
+        raise session_store_unavailable()
+
+
+def issue_tokens(email: str, family: str, refresh_jti: str) -> dict:
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data={"sub": email, "fam": family}, expires_delta=access_token_expires
     )
+    refresh_token = create_refresh_token(email, family, refresh_jti)
 
-    return {"access_token": access_token, "token_type": "bearer"}
+    return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
 
 
-@router.get("/verify-email")
-async def verify_email(token: str = Query(...), db: Session = Depends(get_db)):
+@router.get("/verify-email", dependencies=[Depends(email_verification_limit)])
+async def verify_email(token: str = Query(...), db: AsyncSession = Depends(get_db)):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_jwt(token)
         email = payload.get("sub")
         scope = payload.get("scope")
 
@@ -86,7 +163,8 @@ async def verify_email(token: str = Query(...), db: Session = Depends(get_db)):
                 detail="Недійсний токен верифікації"
             )
 
-        user = db.query(User).filter(User.email == email).first()
+        result = await db.execute(select(User).where(User.email == email))
+        user = result.scalars().first()
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -97,7 +175,8 @@ async def verify_email(token: str = Query(...), db: Session = Depends(get_db)):
             return {"message": "Електронна пошта вже підтверджена"}
 
         user.confirmed = True
-        db.commit()
+        await db.commit()
+        await invalidate_user(user.email)
 
         return {"message": "Електронна пошта успішно підтверджена"}
 
@@ -108,13 +187,14 @@ async def verify_email(token: str = Query(...), db: Session = Depends(get_db)):
         )
 
 
-@router.post("/request-email-verification")
+@router.post("/request-email-verification", dependencies=[Depends(email_verification_limit)])
 async def request_email_verification(
         email_schema: EmailSchema,
-        background_tasks: BackgroundTasks,
-        db: Session = Depends(get_db)
+        request: Request,
+        db: AsyncSession = Depends(get_db)
 ):
-    user = db.query(User).filter(User.email == email_schema.email).first()
+    result = await db.execute(select(User).where(User.email == email_schema.email))
+    user = result.scalars().first()
     if not user:
         return {"message": "Якщо ця електронна адреса зареєстрована, лист з інструкціями буде надіслано"}
 
@@ -123,11 +203,18 @@ async def request_email_verification(
 
     verification_token = create_email_verification_token(user.email)
 
-    await send_verification_email(
-        email=user.email,
-        username=user.username,
-        token=verification_token,
-        background_tasks=background_tasks
-    )
+    try:
+        await send_verification_email(
+            email=user.email,
+            username=user.username,
+            token=verification_token,
+            locale=resolve_locale(request.headers.get("accept-language"))
+        )
+    except RedisError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Не вдалося надіслати лист, спробуйте пізніше",
+            headers={"Retry-After": "5"},
+        )
 
     return {"message": "Лист з інструкціями надіслано"}
@@ -1,21 +1,63 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, UploadFile, File, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import select, insert, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from datetime import date, datetime, timedelta
+from datetime import date
 
 from app.database.db import get_db
 from app.models.contact import Contact
 from app.models.user import User
-from app.schemas.contact import ContactCreate, ContactUpdate, ContactResponse
+from app.schemas.contact import (
+    ContactCreate,
+    ContactUpdate,
+    ContactResponse,
+    ContactImportResult,
+    ContactImportError,
+    ContactBatchRequest,
+    ContactBatchResult,
+    ContactChanges,
+)
 from app.utils.auth import get_current_user
-
-router = APIRouter()
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.birthdays import upcoming_birthdays_window
+from app.utils.search import contact_search_condition, contact_search_rank
+from app.utils.contact_import import (
+    IMPORT_FORMATS,
+    ImportReadError,
+    detect_import_format,
+    iter_import_rows,
+    read_import_chunk,
+    validate_import_row,
+    format_validation_error,
+)
+from app.utils.contact_export import EXPORT_FORMATS, stream_contacts_export
+from app.utils.contact_batch import apply_contact_batch
+from app.utils.sync import get_contact_changes, record_contact_deletions
+from app.utils.rate_limiter import UserRateLimit
+from app.utils.etag import contact_etag, contact_list_etag, etag_matches, not_modified, set_etag
+from app.utils.serialization import contacts_to_dicts, fast_json_response, cached_json_response
+from app.utils.response_cache import ContactResponseCache, bump_contacts_generation, seconds_until_local_midnight
+from app.utils.birthday_digest import get_birthday_digest
+from app.config import (
+    CONTACT_IMPORT_BATCH_SIZE,
+    CONTACT_IMPORT_MAX_ERRORS,
+    CONTACT_EXPORT_BATCH_SIZE,
+    CONTACT_BATCH_MAX_OPERATIONS,
+    CONTACT_SYNC_PAGE_SIZE,
+    RATE_LIMIT_CONTACTS,
+    BIRTHDAY_DIGEST_DAYS,
+)
+
+router = APIRouter(dependencies=[Depends(UserRateLimit("contacts", RATE_LIMIT_CONTACTS))])
 
 
 @router.post("/", response_model=ContactResponse, status_code=201)
-def create_contact(
+async def create_contact(
         contact: ContactCreate,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
         current_user: User = Depends(get_current_user)
 ):
     db_contact = Contact(
@@ -29,115 +71,298 @@ def create_contact(
     )
 
     db.add(db_contact)
-    db.commit()
-    db.refresh(db_contact)
+    await db.commit()
+    await bump_contacts_generation(current_user.id)
+    await db.refresh(db_contact)
 
     return db_contact
 
 
+@router.post("/import", response_model=ContactImportResult)
+async def import_contacts(
+        file: UploadFile = File(..., description="Файл CSV із заголовком або NDJSON"),
+        format: Optional[str] = Query(None, description="Формат файлу: csv або ndjson"),
+        db: AsyncSession = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+):
+    fmt = format or detect_import_format(file.filename, file.content_type)
+    if fmt not in IMPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Підтримуються лише формати csv та ndjson"
+        )
+
+    imported = 0
+    failed = 0
+    errors = []
+    complete = True
+    rows = iter_import_rows(file.file, fmt)
+
+    # Файл читається та валідується частинами, кожна частина вставляється одним пакетним INSERT.
+    # Частини комітяться одразу, тож при помилці читання посеред файлу повертається частковий
+    # результат з complete=False, а не помилка всього запиту
+    while complete:
+        chunk = await run_in_threadpool(read_import_chunk, rows, CONTACT_IMPORT_BATCH_SIZE)
+        if not chunk:
+            break
+
+        values = []
+        for number, row in chunk:
+            if isinstance(row, ImportReadError):
+                complete = False
+                failed += 1
+                errors.append(ContactImportError(row=number, errors=[row.message]))
+                continue
+            if isinstance(row, str):
+                row_errors = [row]
+            else:
+                try:
+                    values.append(validate_import_row(row, current_user.id))
+                    continue
+                except ValidationError as e:
+                    row_errors = format_validation_error(e)
+            failed += 1
+            if len(errors) < CONTACT_IMPORT_MAX_ERRORS:
+                errors.append(ContactImportError(row=number, errors=row_errors))
+
+        if values:
+            await db.execute(insert(Contact), values)
+            await db.commit()
+            await bump_contacts_generation(current_user.id)
+            imported += len(values)
+
+    return ContactImportResult(imported=imported, failed=failed, errors=errors, complete=complete)
+
+
+@router.post("/batch", response_model=ContactBatchResult)
+async def batch_contacts(
+        batch: ContactBatchRequest,
+        db: AsyncSession = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+):
+    if len(batch.operations) > CONTACT_BATCH_MAX_OPERATIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Забагато операцій, максимум {CONTACT_BATCH_MAX_OPERATIONS}"
+        )
+
+    target_ids = [operation.id for operation in batch.operations if operation.op != "create"]
+    if len(target_ids) != len(set(target_ids)):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Кожен контакт можна змінити або видалити лише один раз за запит"
+        )
+
+    results = await apply_contact_batch(db, current_user.id, batch.operations)
+    await bump_contacts_generation(current_user.id)
+
+    return ContactBatchResult(results=results)
+
+
+@router.get("/changes", response_model=ContactChanges)
+async def get_contacts_changes(
+        response: Response,
+        since: Optional[str] = Query(None, description="Токен next_since з попередньої відповіді"),
+        limit: int = Query(CONTACT_SYNC_PAGE_SIZE, ge=1, le=CONTACT_SYNC_PAGE_SIZE),
+        db: AsyncSession = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+):
+    changed, deleted, next_since, has_more = await get_contact_changes(db, current_user.id, since, limit)
+
+    return fast_json_response(
+        {"changed": contacts_to_dicts(changed), "deleted": deleted, "next_since": next_since, "has_more": has_more},
+        response,
+    )
+
+
+@router.get("/export")
+async def export_contacts(
+        format: str = Query("ndjson", description="Формат файлу: csv або ndjson"),
+        current_user: User = Depends(get_current_user)
+):
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Підтримуються лише формати csv та ndjson"
+        )
+
+    return StreamingResponse(
+        stream_contacts_export(current_user.id, format, CONTACT_EXPORT_BATCH_SIZE),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="contacts.{format}"'},
+    )
+
+
 @router.get("/", response_model=List[ContactResponse])
-def get_contacts(
+async def get_contacts(
+        request: Request,
+        response: Response,
         skip: int = 0,
         limit: int = 100,
+        cursor: Optional[str] = Query(None, description="Курсор наступної сторінки із заголовка X-Next-Cursor"),
         first_name: Optional[str] = Query(None, description="Фільтр за ім'ям"),
         last_name: Optional[str] = Query(None, description="Фільтр за прізвищем"),
         email: Optional[str] = Query(None, description="Фільтр за електронною адресою"),
-        db: Session = Depends(get_db),
+        q: Optional[str] = Query(None, min_length=1, description="Пошук за ім'ям, прізвищем або електронною адресою"),
+        db: AsyncSession = Depends(get_db),
         current_user: User = Depends(get_current_user)
 ):
-    query = db.query(Contact).filter(Contact.user_id == current_user.id)
+    cache = ContactResponseCache(current_user.id, "list", request)
+    cached = await cache.get()
+    if cached is not None:
+        etag = cached["headers"].get("etag")
+        if etag and etag_matches(request, etag):
+            return not_modified(etag)
+        return cached_json_response(cached["body"], cached["headers"], response)
+
+    etag = await contact_list_etag(db, current_user.id, request)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
+    query = select(Contact).where(Contact.user_id == current_user.id)
 
     if first_name:
-        query = query.filter(Contact.first_name.ilike(f"%{first_name}%"))
+        query = query.where(Contact.first_name.ilike(f"%{first_name}%"))
     if last_name:
-        query = query.filter(Contact.last_name.ilike(f"%{last_name}%"))
+        query = query.where(Contact.last_name.ilike(f"%{last_name}%"))
     if email:
-        query = query.filter(Contact.email.ilike(f"%{email}%"))
+        query = query.where(Contact.email.ilike(f"%{email}%"))
+
+    sort_key = (Contact.last_name, Contact.first_name, Contact.id)
+
+    # Результати пошуку впорядковані за релевантністю, тому курсор для них не підтримується
+    if q:
+        rank = contact_search_rank(q, db.bind.dialect.name)
+        query = query.where(contact_search_condition(q)).order_by(rank.desc())
+        result = await db.execute(query.order_by(*sort_key).offset(skip).limit(limit))
+        return await cache.store(fast_json_response(contacts_to_dicts(result.scalars()), response))
+
+    if cursor:
+        query = query.where(tuple_(*sort_key) > tuple_(*decode_cursor(cursor, len(sort_key))))
+    else:
+        query = query.offset(skip)
+
+    result = await db.execute(query.order_by(*sort_key).limit(limit))
+    contacts = result.scalars().all()
 
-    contacts = query.offset(skip).limit(limit).all()
+    if contacts and len(contacts) == limit:
+        last = contacts[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor((last.last_name, last.first_name, last.id))
 
-    return contacts
+    return await cache.store(fast_json_response(contacts_to_dicts(contacts), response))
 
 
 @router.get("/birthdays/", response_model=List[ContactResponse])
-def get_upcoming_birthdays(
-        db: Session = Depends(get_db),
+async def get_upcoming_birthdays(
+        request: Request,
+        response: Response,
+        days: int = Query(7, ge=0, le=366, description="Кількість днів наперед, включно з сьогоднішнім"),
+        db: AsyncSession = Depends(get_db),
         current_user: User = Depends(get_current_user)
 ):
     today = date.today()
+    # Щоденний дайджест планувальника віддається як є, поки контакти користувача не змінилися;
+    # після будь-якої зміни (зокрема нових контактів) виконується живий запит
+    if days == BIRTHDAY_DIGEST_DAYS:
+        digest = await get_birthday_digest(current_user.id, today)
+        if digest is not None:
+            return cached_json_response(digest, {}, response)
+
+    # Вікно днів народження залежить від дати, тому запис живе лише до локальної півночі
+    cache = ContactResponseCache(current_user.id, "birthdays", request, scope=today.isoformat())
+    cached = await cache.get()
+    if cached is not None:
+        return cached_json_response(cached["body"], cached["headers"], response)
+
+    condition, order_by = upcoming_birthdays_window(today, days)
+
+    result = await db.execute(
+        select(Contact)
+        .where(Contact.user_id == current_user.id, condition)
+        .order_by(*order_by)
+    )
 
-    contacts = db.query(Contact).filter(Contact.user_id == current_user.id).all()
-
-    upcoming_birthdays = []
-    for contact in contacts:
-        birthday_month_day = (contact.birthday.month, contact.birthday.day)
-
-        for i in range(8):  # від 0 до 7 включно
-            check_date = today + timedelta(days=i)
-            if (check_date.month, check_date.day) == birthday_month_day:
-                upcoming_birthdays.append(contact)
-                break
-
-    return upcoming_birthdays
+    return await cache.store(
+        fast_json_response(contacts_to_dicts(result.scalars()), response),
+        ttl=seconds_until_local_midnight(),
+    )
 
 
 @router.get("/{contact_id}", response_model=ContactResponse)
-def get_contact(
+async def get_contact(
         contact_id: int,
-        db: Session = Depends(get_db),
+        request: Request,
+        response: Response,
+        db: AsyncSession = Depends(get_db),
         current_user: User = Depends(get_current_user)
 ):
-    contact = db.query(Contact).filter(
+    result = await db.execute(select(Contact).where(
         Contact.id == contact_id,
         Contact.user_id == current_user.id
-    ).first()
+    ))
+    contact = result.scalars().first()
 
     if contact is None:
         raise HTTPException(status_code=404, detail="Контакт не знайдено")
 
+    etag = contact_etag(contact)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
     return contact
 
 
 @router.put("/{contact_id}", response_model=ContactResponse)
-def update_contact(
+async def update_contact(
         contact_id: int,
         contact: ContactUpdate,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
         current_user: User = Depends(get_current_user)
 ):
-    db_contact = db.query(Contact).filter(
+    result = await db.execute(select(Contact).where(
         Contact.id == contact_id,
         Contact.user_id == current_user.id
-    ).first()
+    ))
+    db_contact = result.scalars().first()
 
     if db_contact is None:
         raise HTTPException(status_code=404, detail="Контакт не знайдено")
 
-    update_data = contact.dict(exclude_unset=True)
+    cleared = contact.cleared_required_fields()
+    if cleared:
+        raise HTTPException(status_code=422, detail=f"Поля не можуть бути порожніми: {', '.join(cleared)}")
+
+    update_data = contact.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_contact, key, value)
 
-    db.commit()
-    db.refresh(db_contact)
+    await db.commit()
+    await bump_contacts_generation(current_user.id)
+    await db.refresh(db_contact)
 
     return db_contact
 
 
 @router.delete("/{contact_id}", status_code=204)
-def delete_contact(
+async def delete_contact(
         contact_id: int,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
         current_user: User = Depends(get_current_user)
 ):
-    db_contact = db.query(Contact).filter(
+    result = await db.execute(select(Contact).where(
         Contact.id == contact_id,
         Contact.user_id == current_user.id
-    ).first()
+    ))
+    db_contact = result.scalars().first()
 
     if db_contact is None:
         raise HTTPException(status_code=404, detail="Контакт не знайдено")
 
-    db.delete(db_contact)
-    db.commit()
+    await record_contact_deletions(db, current_user.id, [contact_id])
+    await db.delete(db_contact)
+    await db.commit()
+    await bump_contacts_generation(current_user.id)
 
     return None
@@ -1,21 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from sqlalchemy.orm import Session
-from fastapi_limiter.depends import RateLimiter
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database.db import get_db
 from app.models.user import User
 from app.schemas.user import UserResponse, UserUpdate
 from app.utils.auth import get_current_user
-from app.utils.cloudinary import upload_avatar
+from app.utils.avatars import upload_avatar
+from app.utils.rate_limiter import UserRateLimit
+from app.config import RATE_LIMIT_USERS_ME
+from app.utils.cache import invalidate_user
 
 router = APIRouter()
 
 
-@router.get("/me", response_model=UserResponse)
+@router.get("/me", response_model=UserResponse, dependencies=[Depends(UserRateLimit("users_me", RATE_LIMIT_USERS_ME))])
 async def get_current_user_info(
-        current_user: User = Depends(get_current_user),
-        # Обмеження: 10 запитів за 1 хвилину
-        limiter: RateLimiter = Depends(RateLimiter(times=10, seconds=60))
+        current_user: User = Depends(get_current_user)
 ):
     return current_user
 
@@ -24,14 +24,15 @@ async def get_current_user_info(
 async def update_user_info(
         user_update: UserUpdate,
         current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db)
 ):
-    update_data = user_update.dict(exclude_unset=True)
+    update_data = user_update.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(current_user, key, value)
 
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
+    await invalidate_user(current_user.email)
 
     return current_user
 
@@ -40,7 +41,7 @@ async def update_user_info(
 async def update_avatar(
         file: UploadFile = File(...),
         current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db)
 ):
     if not file.content_type.startswith("image/"):
         raise HTTPException(
@@ -50,6 +51,8 @@ async def update_avatar(
 
     try:
         avatar_url = await upload_avatar(file, current_user.id)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -57,7 +60,8 @@ async def update_avatar(
         )
 
     current_user.avatar = avatar_url
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
+    await invalidate_user(current_user.email)
 
     return current_user
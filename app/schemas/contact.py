@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr, Field, validator
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
+from typing import Annotated, List, Literal, Optional, Union
 from datetime import date, datetime
 
 
@@ -11,13 +11,15 @@ class ContactBase(BaseModel):
     birthday: date = Field(..., description="Дата народження контакту")
     additional_data: Optional[str] = Field(None, description="Додаткова інформація про контакт")
 
-    @validator('phone_number')
+    @field_validator('phone_number')
+    @classmethod
     def validate_phone_number(cls, v):
         if not all(c.isdigit() or c in ['+', '-', '(', ')', ' '] for c in v):
             raise ValueError("Номер телефону має містити лише цифри та спеціальні символи: +, -, (, ), пробіл")
         return v
 
-    @validator('birthday')
+    @field_validator('birthday')
+    @classmethod
     def validate_birthday(cls, v):
         if v > date.today():
             raise ValueError("Дата народження не може бути в майбутньому")
@@ -28,6 +30,10 @@ class ContactCreate(ContactBase):
     pass
 
 
+# Поля, що відповідають обов'язковим (NOT NULL) колонкам контакту
+CONTACT_REQUIRED_FIELDS = ("first_name", "last_name", "email", "phone_number", "birthday")
+
+
 class ContactUpdate(BaseModel):
     first_name: Optional[str] = Field(None, min_length=1, max_length=50, description="Ім'я контакту")
     last_name: Optional[str] = Field(None, min_length=1, max_length=50, description="Прізвище контакту")
@@ -36,7 +42,8 @@ class ContactUpdate(BaseModel):
     birthday: Optional[date] = Field(None, description="Дата народження контакту")
     additional_data: Optional[str] = Field(None, description="Додаткова інформація про контакт")
 
-    @validator('phone_number')
+    @field_validator('phone_number')
+    @classmethod
     def validate_phone_number(cls, v):
         if v is None:
             return v
@@ -44,7 +51,8 @@ class ContactUpdate(BaseModel):
             raise ValueError("Номер телефону має містити лише цифри та спеціальні символи: +, -, (, ), пробіл")
         return v
 
-    @validator('birthday')
+    @field_validator('birthday')
+    @classmethod
     def validate_birthday(cls, v):
         if v is None:
             return v
@@ -52,6 +60,10 @@ class ContactUpdate(BaseModel):
             raise ValueError("Дата народження не може бути в майбутньому")
         return v
 
+    def cleared_required_fields(self) -> List[str]:
+        # Пропущене поле не змінюється, а явно передане null не можна записати в обов'язкову колонку
+        return [field for field in CONTACT_REQUIRED_FIELDS if field in self.model_fields_set and getattr(self, field) is None]
+
 
 class ContactInDB(ContactBase):
     id: int
@@ -59,9 +71,78 @@ class ContactInDB(ContactBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
-class ContactResponse(ContactInDB):
-    pass
+# Відповідь будується з уже збережених у базі даних, тому поля не валідуються повторно
+# (перевірка EmailStr та валідатори ContactBase відчутно сповільнюють великі сторінки)
+class ContactResponse(BaseModel):
+    first_name: str
+    last_name: str
+    email: str
+    phone_number: str
+    birthday: date
+    additional_data: Optional[str] = None
+    id: int
+    user_id: int
+    created_at: datetime
+    updated_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ContactImportError(BaseModel):
+    row: int = Field(..., description="Номер рядка у файлі")
+    errors: List[str] = Field(..., description="Помилки валідації рядка")
+
+
+class ContactImportResult(BaseModel):
+    imported: int = Field(..., description="Кількість імпортованих контактів")
+    failed: int = Field(..., description="Кількість рядків з помилками")
+    errors: List[ContactImportError] = Field(default_factory=list, description="Помилки за рядками")
+    complete: bool = Field(True, description="Чи файл прочитано до кінця")
+
+
+class ContactBatchCreate(BaseModel):
+    op: Literal["create"]
+    data: ContactCreate
+
+
+class ContactBatchUpdate(BaseModel):
+    op: Literal["update"]
+    id: int
+    data: ContactUpdate
+
+
+class ContactBatchDelete(BaseModel):
+    op: Literal["delete"]
+    id: int
+
+
+ContactBatchOperation = Annotated[
+    Union[ContactBatchCreate, ContactBatchUpdate, ContactBatchDelete],
+    Field(discriminator="op"),
+]
+
+
+class ContactBatchRequest(BaseModel):
+    operations: List[ContactBatchOperation] = Field(..., min_length=1, description="Операції над контактами")
+
+
+class ContactBatchItemResult(BaseModel):
+    index: int = Field(..., description="Позиція операції у запиті")
+    op: str
+    status: int = Field(..., description="HTTP-статус окремої операції")
+    id: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class ContactBatchResult(BaseModel):
+    results: List[ContactBatchItemResult]
+
+
+class ContactChanges(BaseModel):
+    changed: List[ContactResponse] = Field(..., description="Створені або змінені контакти")
+    deleted: List[int] = Field(..., description="Ідентифікатори видалених контактів")
+    next_since: str = Field(..., description="Токен для наступного запиту змін")
+    has_more: bool = Field(..., description="Чи є ще зміни, які не вмістилися у відповідь")
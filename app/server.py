@@ -0,0 +1,66 @@
+import argparse
+import importlib.util
+import os
+
+import uvicorn
+
+from app.config import (
+    SERVER_HOST,
+    SERVER_PORT,
+    SERVER_WORKERS,
+    SERVER_KEEP_ALIVE,
+    SERVER_BACKLOG,
+    SERVER_GRACEFUL_TIMEOUT,
+    SERVER_ACCESS_LOG,
+    FORWARDED_ALLOW_IPS,
+)
+
+
+def available_cpus() -> int:
+    # Враховує обмеження CPU affinity (taskset, cpuset контейнера), а не лише кількість ядер вузла
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def worker_count(configured: int = SERVER_WORKERS) -> int:
+    return configured if configured > 0 else available_cpus()
+
+
+def event_loop() -> str:
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def http_protocol() -> str:
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Запуск Contacts API")
+    parser.add_argument("--reload", action="store_true", help="Режим розробки: один процес з перезапуском при змінах коду")
+    args = parser.parse_args()
+
+    if args.reload:
+        uvicorn.run("app.main:app", host=SERVER_HOST, port=SERVER_PORT, reload=True)
+        return
+
+    # Кожен воркер - окремий процес зі своїм циклом подій, пулом з'єднань з базою даних
+    # і клієнтом Redis (відкриваються та закриваються в lifespan app.main)
+    uvicorn.run(
+        "app.main:app",
+        host=SERVER_HOST,
+        port=SERVER_PORT,
+        workers=worker_count(),
+        loop=event_loop(),
+        http=http_protocol(),
+        timeout_keep_alive=SERVER_KEEP_ALIVE,
+        backlog=SERVER_BACKLOG,
+        timeout_graceful_shutdown=SERVER_GRACEFUL_TIMEOUT,
+        proxy_headers=True,
+        forwarded_allow_ips=FORWARDED_ALLOW_IPS,
+        access_log=SERVER_ACCESS_LOG,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,95 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from passlib.context import CryptContext
-from jose import JWTError, jwt
+from jose import JWTError
 from datetime import datetime, timedelta
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 
 from app.database.db import get_db
-from app.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.config import ACCESS_TOKEN_EXPIRE_MINUTES, REFRESH_TOKEN_EXPIRE_DAYS
+from app.config import BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE_LIMIT
 from app.schemas.user import TokenData
 from app.models.user import User
+from app.utils.cache import get_cached_user, cache_user
+from app.utils.token_denylist import new_token_id, is_token_revoked
+from app.utils.tokens import encode_jwt, decode_jwt
+from app.utils.metrics import record_auth
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+# bcrypt виконується в окремому пулі потоків, щоб не блокувати цикл подій.
+# Пул відкривається під час старту воркера і закривається під час зупинки (lifespan),
+# тож повторний старт додатку в тому самому процесі отримує новий пул
+_password_hash_executor: Optional[ThreadPoolExecutor] = None
+_password_hash_capacity = PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_LIMIT
+_password_hash_in_flight = 0
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+def start_password_hashing():
+    global _password_hash_executor, _password_hash_in_flight
+    stop_password_hashing()
+    _password_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+    _password_hash_in_flight = 0
 
-def authenticate_user(db: Session, email: str, password: str):
-    user = db.query(User).filter(User.email == email).first()
-    if not user or not verify_password(password, user.password):
+def stop_password_hashing():
+    global _password_hash_executor
+    if _password_hash_executor is not None:
+        _password_hash_executor.shutdown(wait=False)
+        _password_hash_executor = None
+
+async def _run_password_hash(func, *args):
+    global _password_hash_in_flight
+    # Поза lifespan (скрипти, консоль) пул створюється при першому використанні
+    if _password_hash_executor is None:
+        start_password_hashing()
+    if _password_hash_in_flight >= _password_hash_capacity:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Сервер перевантажений, спробуйте пізніше",
+            headers={"Retry-After": "1"},
+        )
+    loop = asyncio.get_running_loop()
+    executor = _password_hash_executor
+    future = executor.submit(func, *args)
+    _password_hash_in_flight += 1
+    # Слот звільняється, коли потік bcrypt справді завершився: скасування запиту
+    # (наприклад, клієнт від'єднався) не зупиняє вже запущений потік
+    future.add_done_callback(lambda _: _release_password_hash_slot(loop, executor))
+    return await asyncio.wrap_future(future)
+
+def _release_password_hash_slot(loop, executor):
+    # Викликається з потоку bcrypt, тому лічильник змінюється в циклі подій
+    if not loop.is_closed():
+        loop.call_soon_threadsafe(_decrement_password_hash_in_flight, executor)
+
+def _decrement_password_hash_in_flight(executor):
+    global _password_hash_in_flight
+    # Потоки пулу, закритого до повторного старту, не зменшують лічильник нового пулу
+    if executor is _password_hash_executor:
+        _password_hash_in_flight -= 1
+
+async def verify_password(plain_password, hashed_password):
+    return await _run_password_hash(pwd_context.verify, plain_password, hashed_password)
+
+async def get_password_hash(password):
+    return await _run_password_hash(pwd_context.hash, password)
+
+async def authenticate_user(db: AsyncSession, email: str, password: str):
+    result = await db.execute(select(User).where(User.email == email))
+    user = result.scalars().first()
+    if not user or not await verify_password(password, user.password):
         return False
+    # Перехешування пароля, якщо збережений хеш має застарілу вартість
+    if pwd_context.needs_update(user.password):
+        user.password = await get_password_hash(password)
+        await db.commit()
     return user
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -33,25 +98,63 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    to_encode.update({"exp": expire, "jti": new_token_id(), "scope": "access_token"})
+    encoded_jwt = encode_jwt(to_encode)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
+def create_refresh_token(email: str, family: str, jti: str):
+    expire = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    to_encode = {"sub": email, "exp": expire, "jti": jti, "fam": family, "scope": "refresh_token"}
+    return encode_jwt(to_encode)
+
+def credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Не вдалося підтвердити облікові дані",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def session_store_unavailable():
+    # Сесії (сімейства refresh-токенів) зберігаються в Redis: без нього їх не можна
+    # ні відкрити, ні відкликати, тому клієнт отримує 503 замість 500
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Сервіс сесій тимчасово недоступний, спробуйте пізніше",
+        headers={"Retry-After": "5"},
+    )
+
+def decode_token(token: str, scope: str) -> dict:
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-        token_data = TokenData(email=email)
+        payload = decode_jwt(token)
     except JWTError:
-        raise credentials_exception
-    user = db.query(User).filter(User.email == token_data.email).first()
+        raise credentials_exception()
+    if payload.get("scope") != scope or payload.get("sub") is None:
+        raise credentials_exception()
+    return payload
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
+    started_at = time.perf_counter()
+    try:
+        return await _resolve_current_user(token, db)
+    finally:
+        record_auth(time.perf_counter() - started_at)
+
+async def _resolve_current_user(token: str, db: AsyncSession):
+    payload = decode_token(token, "access_token")
+    if await is_token_revoked(payload.get("jti"), payload.get("fam")):
+        raise credentials_exception()
+    token_data = TokenData(email=payload["sub"])
+
+    # Знімок користувача з кешу приєднуємо до сесії без запиту до бази
+    snapshot = await get_cached_user(token_data.email)
+    if snapshot is not None:
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        return await db.merge(user, load=False)
+
+    result = await db.execute(select(User).where(User.email == token_data.email))
+    user = result.scalars().first()
     if user is None:
-        raise credentials_exception
-    return user
\ No newline at end of file
+        raise credentials_exception()
+    await cache_user(user)
+    return user
@@ -0,0 +1,95 @@
+import io
+import os
+import tempfile
+from pathlib import Path
+
+from fastapi import HTTPException, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from app.config import (
+    APP_BASE_URL,
+    AVATAR_STORAGE,
+    AVATAR_LOCAL_DIR,
+    AVATAR_LOCAL_URL_PATH,
+    AVATAR_MAX_BYTES,
+    AVATAR_MAX_PIXELS,
+    AVATAR_SIZE,
+    AVATAR_FORMAT,
+    AVATAR_QUALITY,
+)
+from app.utils.cloudinary import CloudinaryAvatarStorage
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+# Межа для всього тіла запиту: файл плюс запас на межі multipart та заголовки частини
+AVATAR_MAX_REQUEST_BYTES = AVATAR_MAX_BYTES + 64 * 1024
+
+
+class LocalAvatarStorage:
+    def __init__(self, directory: str = AVATAR_LOCAL_DIR, url_path: str = AVATAR_LOCAL_URL_PATH):
+        self.directory = Path(directory)
+        self.url_path = url_path.rstrip("/")
+
+    def save(self, user_id: int, contents: bytes, extension: str) -> str:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        filename = f"user_{user_id}.{extension}"
+        # Запис у тимчасовий файл і атомарна заміна, щоб не віддати частково записаний аватар
+        with tempfile.NamedTemporaryFile(dir=self.directory, delete=False) as tmp:
+            tmp.write(contents)
+        os.replace(tmp.name, self.directory / filename)
+        return f"{APP_BASE_URL}{self.url_path}/{filename}"
+
+
+AVATAR_STORAGES = {
+    "cloudinary": CloudinaryAvatarStorage,
+    "local": LocalAvatarStorage,
+}
+
+avatar_storage = AVATAR_STORAGES[AVATAR_STORAGE]()
+
+
+async def read_upload_limited(file: UploadFile, max_bytes: int = AVATAR_MAX_BYTES) -> bytes:
+    # Розмір тіла запиту обмежує RequestBodyLimitMiddleware ще під час отримання;
+    # тут перевіряється точний розмір самого файлу, вже збереженого Starlette
+    if file.size is not None and file.size > max_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Файл завеликий, максимум {max_bytes} байт"
+        )
+
+    buffer = bytearray()
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        buffer.extend(chunk)
+        if len(buffer) > max_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Файл завеликий, максимум {max_bytes} байт"
+            )
+    return bytes(buffer)
+
+
+def resize_avatar(contents: bytes, size: int = AVATAR_SIZE, fmt: str = AVATAR_FORMAT) -> bytes:
+    try:
+        image = Image.open(io.BytesIO(contents))
+        if image.width * image.height > AVATAR_MAX_PIXELS:
+            raise ValueError("too many pixels")
+        # Для JPEG декодер одразу зменшує зображення, не розпаковуючи його повністю
+        image.draft("RGB", (size, size))
+        image = ImageOps.exif_transpose(image)
+        image = ImageOps.fit(image.convert("RGB"), (size, size), Image.Resampling.LANCZOS)
+    except (UnidentifiedImageError, ValueError, OSError, Image.DecompressionBombError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Файл не є коректним зображенням"
+        )
+
+    output = io.BytesIO()
+    image.save(output, format=fmt.upper(), quality=AVATAR_QUALITY)
+    return output.getvalue()
+
+
+async def upload_avatar(file: UploadFile, user_id: int) -> str:
+    contents = await read_upload_limited(file)
+    # Обробка зображення та завантаження у сховище виконуються в пулі потоків
+    avatar = await run_in_threadpool(resize_avatar, contents)
+    return await run_in_threadpool(avatar_storage.save, user_id, avatar, AVATAR_FORMAT.lower())
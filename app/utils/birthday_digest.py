@@ -0,0 +1,86 @@
+from datetime import date
+from typing import Optional
+
+import orjson
+from redis.exceptions import RedisError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import BIRTHDAY_DIGEST_DAYS, BIRTHDAY_DIGEST_EMAILS, BIRTHDAY_DIGEST_WRITE_BATCH
+from app.models.contact import Contact
+from app.models.user import User
+from app.utils.birthdays import upcoming_birthdays_window
+from app.utils.email import send_birthday_digest_email
+from app.utils.redis_client import redis_client
+from app.utils.response_cache import contacts_generation_key, get_contacts_generations, seconds_until_local_midnight
+from app.utils.serialization import CONTACT_FIELDS
+
+# Запас після півночі, щоб дайджест учорашнього дня не зник раніше, ніж буде готовий новий
+DIGEST_TTL_GRACE_SECONDS = 3600
+
+
+def birthday_digest_key(day: date, user_id: int) -> str:
+    return f"birthdays:digest:{day.isoformat()}:{user_id}"
+
+
+def birthday_digest_ready_key(day: date) -> str:
+    return f"birthdays:digest:{day.isoformat()}:ready"
+
+
+async def build_birthday_digests(db: AsyncSession, today: date, send_emails: bool = BIRTHDAY_DIGEST_EMAILS) -> dict:
+    users = (await db.execute(select(User.id, User.email, User.username, User.confirmed).order_by(User.id))).all()
+    user_ids = [user.id for user in users]
+
+    # Покоління читаються до вибірки: якщо контакти зміняться під час розрахунку,
+    # збережене покоління не збіжеться з поточним і ендпоінт виконає живий запит
+    generations = await get_contacts_generations(user_ids)
+
+    # Один прохід по contacts для всіх користувачів замість окремого запиту на кожного
+    condition, order_by = upcoming_birthdays_window(today, BIRTHDAY_DIGEST_DAYS)
+    query = (
+        select(*(getattr(Contact, field) for field in CONTACT_FIELDS))
+        .where(condition)
+        .order_by(Contact.user_id, *order_by)
+        .execution_options(yield_per=BIRTHDAY_DIGEST_WRITE_BATCH)
+    )
+    upcoming = {}
+    result = await db.stream(query)
+    async for rows in result.partitions():
+        for row in rows:
+            upcoming.setdefault(row.user_id, []).append(dict(row._mapping))
+
+    ttl = seconds_until_local_midnight() + DIGEST_TTL_GRACE_SECONDS
+    for start in range(0, len(user_ids), BIRTHDAY_DIGEST_WRITE_BATCH):
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for user_id in user_ids[start:start + BIRTHDAY_DIGEST_WRITE_BATCH]:
+                key = birthday_digest_key(today, user_id)
+                pipe.hset(key, mapping={
+                    "generation": generations[user_id],
+                    "body": orjson.dumps(upcoming.get(user_id, [])),
+                })
+                pipe.expire(key, ttl)
+            await pipe.execute()
+    await redis_client.set(birthday_digest_ready_key(today), 1, ex=ttl)
+
+    emails = 0
+    if send_emails:
+        for user in users:
+            if user.confirmed and upcoming.get(user.id):
+                await send_birthday_digest_email(user.email, user.username, upcoming[user.id])
+                emails += 1
+
+    return {"users": len(user_ids), "contacts": sum(len(items) for items in upcoming.values()), "emails": emails}
+
+
+async def get_birthday_digest(user_id: int, today: date) -> Optional[bytes]:
+    # Готове тіло відповіді віддається лише якщо контакти не змінювалися після розрахунку
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.get(contacts_generation_key(user_id))
+            pipe.hgetall(birthday_digest_key(today, user_id))
+            generation, digest = await pipe.execute()
+    except RedisError:
+        return None
+    if not digest or int(digest[b"generation"]) != int(generation or 0):
+        return None
+    return digest[b"body"]
@@ -0,0 +1,27 @@
+import calendar
+from datetime import date, timedelta
+
+from sqlalchemy import and_, case, or_, true
+
+from app.models.contact import Contact, birthday_month_day
+
+
+def upcoming_birthdays_window(today: date, days: int):
+    end = today + timedelta(days=days)
+    start_md = birthday_month_day(today)
+    end_md = birthday_month_day(end)
+
+    # У невисокосний рік народжені 29 лютого святкують 28 лютого
+    if end_md == 228 and not calendar.isleap(end.year):
+        end_md = 229
+
+    if days >= 365:
+        condition = true()
+    elif end.year == today.year:
+        condition = and_(Contact.birthday_md >= start_md, Contact.birthday_md <= end_md)
+    else:
+        condition = or_(Contact.birthday_md >= start_md, Contact.birthday_md <= end_md)
+
+    # Спочатку дні народження цього року, потім ті, що після переходу через Новий рік
+    order_by = (case((Contact.birthday_md < start_md, 1), else_=0), Contact.birthday_md, Contact.id)
+    return condition, order_by
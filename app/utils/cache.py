@@ -0,0 +1,115 @@
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+
+from redis.exceptions import RedisError
+
+from app.config import USER_CACHE_TTL, USER_CACHE_LOCAL_TTL, USER_CACHE_LOCAL_SIZE, USER_CACHE_INVALIDATION_TTL
+from app.utils.redis_client import redis_client
+
+USER_SNAPSHOT_FIELDS = ("id", "username", "email", "avatar", "confirmed", "created_at", "updated_at")
+USER_DATETIME_FIELDS = ("created_at", "updated_at")
+# Маркер нещодавньої інвалідації: поки він живий, знімок, прочитаний до зміни, не потрапить у кеш
+USER_CACHE_TOMBSTONE = b"-"
+
+
+class TTLCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+
+    def get(self, key):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value, ttl: Optional[float] = None):
+        self._data[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+# Короткий локальний кеш перед Redis, щоб не ходити в Redis на кожен запит
+user_local_cache = TTLCache(USER_CACHE_LOCAL_SIZE, USER_CACHE_LOCAL_TTL)
+
+
+def _user_cache_key(email: str) -> str:
+    return f"user:{email}"
+
+
+def user_snapshot(user) -> dict:
+    return {field: getattr(user, field) for field in USER_SNAPSHOT_FIELDS}
+
+
+def _dump_snapshot(snapshot: dict) -> str:
+    return json.dumps({
+        key: value.isoformat() if isinstance(value, datetime) else value
+        for key, value in snapshot.items()
+    })
+
+
+def _load_snapshot(raw) -> dict:
+    snapshot = json.loads(raw)
+    for field in USER_DATETIME_FIELDS:
+        if snapshot.get(field):
+            snapshot[field] = datetime.fromisoformat(snapshot[field])
+    return snapshot
+
+
+async def get_cached_user(email: str) -> Optional[dict]:
+    key = _user_cache_key(email)
+    snapshot = user_local_cache.get(key)
+    if snapshot is not None:
+        return snapshot
+
+    try:
+        raw = await redis_client.get(key)
+    except RedisError:
+        return None
+    if raw is None or raw == USER_CACHE_TOMBSTONE:
+        return None
+
+    snapshot = _load_snapshot(raw)
+    user_local_cache.set(key, snapshot)
+    return snapshot
+
+
+async def cache_user(user):
+    # Заповнення після промаху: SET NX не перезапише ні маркер інвалідації, ні новіший знімок,
+    # тож запит, що прочитав користувача до чужого commit, не поверне в кеш застарілі дані
+    key = _user_cache_key(user.email)
+    snapshot = user_snapshot(user)
+    try:
+        stored = await redis_client.set(key, _dump_snapshot(snapshot), ex=USER_CACHE_TTL, nx=True)
+    except RedisError:
+        stored = True
+    if stored:
+        user_local_cache.set(key, snapshot)
+
+
+async def invalidate_user(email: str):
+    key = _user_cache_key(email)
+    user_local_cache.pop(key)
+    try:
+        await redis_client.set(key, USER_CACHE_TOMBSTONE, ex=USER_CACHE_INVALIDATION_TTL)
+    except RedisError:
+        pass
@@ -0,0 +1,95 @@
+from collections import defaultdict
+
+from sqlalchemy import bindparam, delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.contact import Contact, birthday_month_day
+from app.schemas.contact import ContactBatchItemResult
+from app.utils.sync import record_contact_deletions
+
+contacts_table = Contact.__table__
+
+
+async def apply_contact_batch(db: AsyncSession, user_id: int, operations) -> list:
+    results = [None] * len(operations)
+    creates = []
+    updates = []
+    deletes = []
+
+    for index, operation in enumerate(operations):
+        if operation.op == "create":
+            creates.append((index, operation))
+        elif operation.op == "update":
+            cleared = operation.data.cleared_required_fields()
+            if cleared:
+                results[index] = ContactBatchItemResult(
+                    index=index, op=operation.op, status=422, id=operation.id,
+                    detail=f"Поля не можуть бути порожніми: {', '.join(cleared)}",
+                )
+            else:
+                updates.append((index, operation))
+        else:
+            deletes.append((index, operation))
+
+    # Один запит для перевірки, які з контактів існують і належать користувачу
+    target_ids = {operation.id for _, operation in updates + deletes}
+    existing_ids = set()
+    if target_ids:
+        result = await db.execute(
+            select(Contact.id).where(Contact.user_id == user_id, Contact.id.in_(target_ids))
+        )
+        existing_ids = set(result.scalars().all())
+
+    for index, operation in updates + deletes:
+        if operation.id not in existing_ids:
+            results[index] = ContactBatchItemResult(
+                index=index, op=operation.op, status=404, id=operation.id, detail="Контакт не знайдено"
+            )
+
+    if creates:
+        values = []
+        for _, operation in creates:
+            row = operation.data.model_dump()
+            row["user_id"] = user_id
+            row["birthday_md"] = birthday_month_day(operation.data.birthday)
+            values.append(row)
+        result = await db.execute(
+            insert(Contact).returning(Contact.id, sort_by_parameter_order=True), values
+        )
+        for (index, operation), contact_id in zip(creates, result.scalars().all()):
+            results[index] = ContactBatchItemResult(index=index, op=operation.op, status=201, id=contact_id)
+
+    # Оновлення групуються за набором змінених полів: одна група - один executemany
+    update_groups = defaultdict(list)
+    for index, operation in updates:
+        if operation.id not in existing_ids:
+            continue
+        data = operation.data.model_dump(exclude_unset=True)
+        if data.get("birthday") is not None:
+            data["birthday_md"] = birthday_month_day(data["birthday"])
+        if data:
+            update_groups[tuple(sorted(data))].append({"_id": operation.id, **data})
+        results[index] = ContactBatchItemResult(index=index, op=operation.op, status=200, id=operation.id)
+
+    for fields, rows in update_groups.items():
+        await db.execute(
+            update(contacts_table)
+            .where(contacts_table.c.id == bindparam("_id"), contacts_table.c.user_id == user_id)
+            .values({field: bindparam(field) for field in fields}),
+            rows,
+        )
+
+    delete_ids = [operation.id for _, operation in deletes if operation.id in existing_ids]
+    if delete_ids:
+        await record_contact_deletions(db, user_id, delete_ids)
+        await db.execute(
+            delete(Contact)
+            .where(Contact.user_id == user_id, Contact.id.in_(delete_ids))
+            .execution_options(synchronize_session=False)
+        )
+        for index, operation in deletes:
+            if operation.id in existing_ids:
+                results[index] = ContactBatchItemResult(index=index, op=operation.op, status=204, id=operation.id)
+
+    await db.commit()
+    return results
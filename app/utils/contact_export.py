@@ -0,0 +1,58 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+
+from sqlalchemy import select
+
+from app.database.db import SessionLocal
+from app.models.contact import Contact
+from app.schemas.contact import ContactResponse
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+EXPORT_FIELDS = tuple(ContactResponse.model_fields)
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _serialize_ndjson(rows):
+    return "".join(
+        json.dumps(dict(row._mapping), default=_json_default, ensure_ascii=False) + "\n"
+        for row in rows
+    )
+
+
+def _serialize_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(
+        [value.isoformat() if isinstance(value, (date, datetime)) else value for value in row]
+        for row in rows
+    )
+    return buffer.getvalue()
+
+
+async def stream_contacts_export(user_id: int, fmt: str, batch_size: int):
+    serialize = _serialize_csv if fmt == "csv" else _serialize_ndjson
+    if fmt == "csv":
+        yield _serialize_csv([EXPORT_FIELDS])
+
+    # Окрема сесія, бо залежність get_db закривається до початку передавання відповіді.
+    # Вибираються лише колонки (без ORM-об'єктів), курсор читається частинами.
+    query = (
+        select(*(getattr(Contact, field) for field in EXPORT_FIELDS))
+        .where(Contact.user_id == user_id)
+        .order_by(Contact.id)
+        .execution_options(yield_per=batch_size)
+    )
+    async with SessionLocal() as db:
+        result = await db.stream(query)
+        async for rows in result.partitions():
+            yield serialize(rows)
@@ -0,0 +1,80 @@
+import csv
+import io
+import json
+from itertools import islice
+
+from pydantic import ValidationError
+
+from app.models.contact import birthday_month_day
+from app.schemas.contact import ContactCreate
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+
+def detect_import_format(filename: str, content_type: str):
+    name = (filename or "").lower()
+    if name.endswith(".csv") or content_type in ("text/csv", "application/csv"):
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")) or content_type in ("application/x-ndjson", "application/jsonl"):
+        return "ndjson"
+    return None
+
+
+class ImportReadError:
+    # Помилка, після якої файл неможливо читати далі (кодування, пошкоджений CSV)
+    def __init__(self, message: str):
+        self.message = message
+
+
+def _iter_csv_rows(text):
+    reader = csv.DictReader(text)
+    for row in reader:
+        yield reader.line_num, {key: value if value != "" else None for key, value in row.items() if key}
+
+
+def _iter_ndjson_rows(text):
+    for number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield number, f"Некоректний JSON: {e}"
+            continue
+        if not isinstance(row, dict):
+            yield number, "Рядок має бути JSON-об'єктом"
+            continue
+        yield number, row
+
+
+def iter_import_rows(binary_file, fmt: str):
+    # Повертає пари (номер рядка, словник або текст помилки розбору);
+    # останньою може бути пара з ImportReadError, після неї рядків більше немає
+    text = io.TextIOWrapper(binary_file, encoding="utf-8-sig", newline="")
+    number = 0
+    try:
+        for number, row in (_iter_csv_rows(text) if fmt == "csv" else _iter_ndjson_rows(text)):
+            yield number, row
+    except UnicodeDecodeError:
+        yield number + 1, ImportReadError("Не вдалося прочитати файл, очікується UTF-8; подальші рядки не імпортовано")
+    except csv.Error as e:
+        yield number + 1, ImportReadError(f"Некоректний CSV: {e}; подальші рядки не імпортовано")
+
+
+def read_import_chunk(rows, size: int):
+    return list(islice(rows, size))
+
+
+def validate_import_row(row, user_id: int):
+    contact = ContactCreate(**row)
+    values = contact.model_dump()
+    values["user_id"] = user_id
+    values["birthday_md"] = birthday_month_day(contact.birthday)
+    return values
+
+
+def format_validation_error(error: ValidationError):
+    return [
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" if item["loc"] else item["msg"]
+        for item in error.errors()
+    ]
@@ -1,45 +1,50 @@
-from pathlib import Path
-from fastapi_mail import FastMail, MessageSchema, MessageType
-from fastapi import BackgroundTasks
+from typing import List
+from urllib.parse import urlencode
+
 from pydantic import EmailStr
-from jose import jwt
 from datetime import datetime, timedelta, timezone
 
-from app.config import mail_config, SECRET_KEY, ALGORITHM
+from app.config import APP_BASE_URL, VERIFICATION_URL_PATH, MAIL_DEFAULT_LOCALE
+from app.utils.mail_queue import enqueue_email
+from app.utils.templates import render_email
+from app.utils.tokens import encode_jwt
+
+EMAIL_VERIFICATION_EXPIRE_HOURS = 24
 
 def create_email_verification_token(email: EmailStr):
-    expire = datetime.now(timezone.utc) + timedelta(hours=24)
+    expire = datetime.now(timezone.utc) + timedelta(hours=EMAIL_VERIFICATION_EXPIRE_HOURS)
     to_encode = {"exp": expire, "sub": email, "scope": "email_verification"}
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = encode_jwt(to_encode)
     return encoded_jwt
 
-async def send_verification_email(email: EmailStr, username: str, token: str, background_tasks: BackgroundTasks):
-    verification_url = f"http://localhost:8000/api/v1/auth/verify-email?token={token}"
-    
-    # Шаблон листа для верифікації
-    html_content = f"""
-    <html>
-    <head>
-        <title>Підтвердження електронної пошти</title>
-    </head>
-    <body>
-        <h3>Вітаємо, {username}!</h3>
-        <p>Дякуємо за реєстрацію в нашому сервісі контактів.</p>
-        <p>Для підтвердження вашої електронної пошти, будь ласка, перейдіть за наступним посиланням:</p>
-        <p><a href="{verification_url}">{verification_url}</a></p>
-        <p>Посилання дійсне протягом 24 годин.</p>
-        <p>Якщо ви не реєструвалися в нашому сервісі, проігноруйте цей лист.</p>
-        <p>З повагою,<br>Команда Contacts API</p>
-    </body>
-    </html>
-    """
-    
-    message = MessageSchema(
-        subject="Підтвердження електронної пошти",
+async def send_verification_email(email: EmailStr, username: str, token: str, locale: str = MAIL_DEFAULT_LOCALE):
+    verification_url = f"{APP_BASE_URL}{VERIFICATION_URL_PATH}?{urlencode({'token': token})}"
+
+    subject, html_content = render_email(
+        "verification.html",
+        locale,
+        username=username,
+        verification_url=verification_url,
+        expire_hours=EMAIL_VERIFICATION_EXPIRE_HOURS,
+    )
+
+    # Лист ставиться в чергу Redis, надсилає його окремий процес app.workers.mail_worker
+    await enqueue_email(
+        recipients=[email],
+        subject=subject,
+        html=html_content,
+    )
+
+async def send_birthday_digest_email(email: EmailStr, username: str, contacts: List[dict], locale: str = MAIL_DEFAULT_LOCALE):
+    subject, html_content = render_email(
+        "birthday_digest.html",
+        locale,
+        username=username,
+        contacts=contacts,
+    )
+
+    await enqueue_email(
         recipients=[email],
-        body=html_content,
-        subtype=MessageType.html
+        subject=subject,
+        html=html_content,
     )
-    
-    fm = FastMail(mail_config)
-    background_tasks.add_task(fm.send_message, message)
\ No newline at end of file
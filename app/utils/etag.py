@@ -0,0 +1,53 @@
+import hashlib
+
+from fastapi import Request, Response, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.contact import Contact
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def contact_etag(contact) -> str:
+    return f'"{contact.id}.{contact.version}"'
+
+
+async def contact_list_etag(db: AsyncSession, user_id: int, request: Request) -> str:
+    # Дешевий агрегат замість завантаження списку: змінюється при будь-якому створенні,
+    # оновленні чи видаленні контакту користувача
+    result = await db.execute(
+        select(
+            func.count(Contact.id),
+            func.max(Contact.id),
+            func.max(Contact.updated_at),
+            func.sum(Contact.version),
+        ).where(Contact.user_id == user_id)
+    )
+    state = ":".join(str(value) for value in result.one())
+    params = "&".join(f"{key}={value}" for key, value in sorted(request.query_params.multi_items()))
+    digest = hashlib.sha256(f"{user_id}|{state}|{request.url.path}|{params}".encode()).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Для If-None-Match використовується слабке порівняння, тому префікс W/ ігнорується
+    candidates = {candidate.strip().removeprefix("W/") for candidate in header.split(",")}
+    return etag in candidates
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+    )
+
+
+def set_etag(response: Response, etag: str):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
@@ -0,0 +1,36 @@
+import json
+import time
+import uuid
+from typing import List
+
+from app.utils.redis_client import redis_client
+
+MAIL_OUTBOX_KEY = "mail:outbox"
+MAIL_RETRY_KEY = "mail:retry"
+MAIL_DEAD_KEY = "mail:dead"
+MAIL_WORKERS_KEY = "mail:workers"
+
+
+def mail_processing_key(worker_id: str) -> str:
+    return f"mail:processing:{worker_id}"
+
+
+def mail_worker_heartbeat_key(worker_id: str) -> str:
+    return f"mail:worker:{worker_id}"
+
+
+def build_mail_message(recipients: List[str], subject: str, html: str) -> dict:
+    return {
+        "id": uuid.uuid4().hex,
+        "recipients": list(recipients),
+        "subject": subject,
+        "html": html,
+        "attempts": 0,
+        "created_at": time.time(),
+    }
+
+
+async def enqueue_email(recipients: List[str], subject: str, html: str, redis=None):
+    message = build_mail_message(recipients, subject, html)
+    await (redis or redis_client).lpush(MAIL_OUTBOX_KEY, json.dumps(message))
+    return message["id"]
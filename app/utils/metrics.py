@@ -0,0 +1,182 @@
+import bisect
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+# Метрики зберігаються в пам'яті процесу; при кількох воркерах Prometheus
+# опитує кожен процес окремо (або агрегує за міткою instance)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _format_labels(names, values) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    def __init__(self, name: str, description: str, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}
+
+    def observe(self, value: float, *label_values):
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series["buckets"][index] += 1
+        series["sum"] += value
+        series["count"] += 1
+
+    def render(self):
+        yield f"# HELP {self.name} {self.description}"
+        yield f"# TYPE {self.name} histogram"
+        label_names = self.labels + ("le",)
+        for label_values, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series["buckets"]):
+                cumulative += count
+                labels = _format_labels(label_names, label_values + (_format_value(float(bound)),))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            yield f"{self.name}_bucket{_format_labels(label_names, label_values + ('+Inf',))} {series['count']}"
+            yield f"{self.name}_sum{_format_labels(self.labels, label_values)} {_format_value(series['sum'])}"
+            yield f"{self.name}_count{_format_labels(self.labels, label_values)} {series['count']}"
+
+
+class CallbackMetric:
+    # Значення зчитується з існуючої статистики у момент опитування /metrics
+    def __init__(self, name: str, description: str, collect, metric_type: str = "gauge"):
+        self.name = name
+        self.description = description
+        self.collect = collect
+        self.metric_type = metric_type
+
+    def render(self):
+        yield f"# HELP {self.name} {self.description}"
+        yield f"# TYPE {self.name} {self.metric_type}"
+        yield f"{self.name} {_format_value(self.collect())}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds",
+    "Тривалість обробки HTTP-запиту",
+    labels=("method", "route", "status"),
+))
+http_request_db_queries = registry.register(Histogram(
+    "http_request_db_queries",
+    "Кількість SQL-запитів на один HTTP-запит",
+    labels=("method", "route"),
+    buckets=QUERY_COUNT_BUCKETS,
+))
+db_query_duration = registry.register(Histogram(
+    "db_query_duration_seconds",
+    "Тривалість виконання SQL-запиту",
+))
+auth_duration = registry.register(Histogram(
+    "auth_current_user_duration_seconds",
+    "Тривалість визначення поточного користувача (get_current_user)",
+))
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.auth_seconds = 0.0
+
+    def server_timing(self, total_seconds: float) -> str:
+        parts = [f"app;dur={total_seconds * 1000:.2f}", f'db;dur={self.db_seconds * 1000:.2f};desc="{self.db_queries} queries"']
+        if self.auth_seconds:
+            parts.append(f"auth;dur={self.auth_seconds * 1000:.2f}")
+        return ", ".join(parts)
+
+
+# Метрики поточного запиту; SQLAlchemy-хуки та get_current_user доповнюють їх
+current_request_metrics: ContextVar[Optional[RequestMetrics]] = ContextVar("current_request_metrics", default=None)
+
+
+def record_db_query(seconds: float):
+    db_query_duration.observe(seconds)
+    metrics = current_request_metrics.get()
+    if metrics is not None:
+        metrics.db_queries += 1
+        metrics.db_seconds += seconds
+
+
+def record_auth(seconds: float):
+    auth_duration.observe(seconds)
+    metrics = current_request_metrics.get()
+    if metrics is not None:
+        metrics.auth_seconds += seconds
+
+
+def render_metrics() -> str:
+    return registry.render()
+
+
+class MetricsMiddleware:
+    # Чистий ASGI middleware: вимірює запит, додає заголовок Server-Timing
+    # і записує гістограми за шаблоном маршруту (/contacts/{contact_id}), а не за фактичним шляхом
+    def __init__(self, app, server_timing: bool = True):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = RequestMetrics()
+        token = current_request_metrics.set(metrics)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    timing = metrics.server_timing(time.perf_counter() - metrics.started_at)
+                    message["headers"] = list(message.get("headers", [])) + [(b"server-timing", timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request_metrics.reset(token)
+            route = scope.get("route")
+            route_name = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            http_request_duration.observe(time.perf_counter() - metrics.started_at, method, route_name, str(status_code))
+            http_request_db_queries.observe(metrics.db_queries, method, route_name)
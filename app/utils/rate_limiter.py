@@ -1,9 +1,203 @@
-import redis.asyncio as redis
-from fastapi import Depends, HTTPException, Request, status
-from fastapi_limiter import FastAPILimiter
-from app.config import REDIS_HOST, REDIS_PORT
-
-async def setup_limiter():
-    redis_url = f"redis://{REDIS_HOST}:{REDIS_PORT}/0"
-    redis_instance = redis.from_url(redis_url)
-    await FastAPILimiter.init(redis_instance)
\ No newline at end of file
+import asyncio
+import logging
+import math
+import time
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from redis.exceptions import RedisError
+
+from app.config import RATE_LIMIT_ENABLED, RATE_LIMIT_LOCAL_FRACTION, RATE_LIMIT_LEASE_TTL
+from app.models.user import User
+from app.utils.auth import get_current_user
+from app.utils.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Ковзне вікно з двох фіксованих вікон: лічильник попереднього вікна враховується
+# пропорційно частині, що ще потрапляє у ковзне вікно. Спершу повертаються невикористані
+# дозволи попередніх оренд цього процесу (ARGV[6], ARGV[7] для KEYS[1], KEYS[2]), потім
+# видається до ARGV[4] дозволів, але не більше 1/ARGV[5] залишку, щоб біля ліміту оренди
+# зменшувались. Повертає {видано, оцінка використаних, мс до кінця вікна}.
+SLIDING_WINDOW_LUA = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local share = tonumber(ARGV[5])
+for i = 1, 2 do
+    local refund = math.min(tonumber(ARGV[5 + i]), tonumber(redis.call('GET', KEYS[i]) or '0'))
+    if refund > 0 then
+        redis.call('DECRBY', KEYS[i], refund)
+    end
+end
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+local elapsed = (now % window) / window
+local used = previous * (1 - elapsed) + current
+local available = math.floor(limit - used)
+local reset = window - (now % window)
+if available <= 0 then
+    return {0, math.ceil(used), reset}
+end
+local granted = math.min(cost, math.max(1, math.floor(available / share)))
+redis.call('INCRBY', KEYS[1], granted)
+redis.call('PEXPIRE', KEYS[1], window * 2)
+return {granted, math.ceil(used + granted), reset}
+"""
+
+# Повернення невикористаних дозволів у лічильник вікна, з якого їх взято
+REFUND_LUA = """
+local refund = math.min(tonumber(ARGV[1]), tonumber(redis.call('GET', KEYS[1]) or '0'))
+if refund > 0 then
+    redis.call('DECRBY', KEYS[1], refund)
+end
+return refund
+"""
+
+sliding_window_script = redis_client.register_script(SLIDING_WINDOW_LUA)
+refund_script = redis_client.register_script(REFUND_LUA)
+
+# Локальні "оренди" дозволів: процес бере з Redis одразу пачку дозволів і видає їх
+# без звернення до Redis. Оренда живе не довше RATE_LIMIT_LEASE_TTL, а невикористані
+# дозволи повертаються в Redis, тож оренда одного воркера не обмежує запити до інших
+local_buckets = {}
+# Невикористані дозволи, що чекають на повернення: ключ вікна в Redis -> кількість
+pending_refunds = {}
+
+
+def _release(bucket: dict):
+    if bucket["tokens"] > 0:
+        window_key = bucket["window_key"]
+        pending_refunds[window_key] = pending_refunds.get(window_key, 0) + bucket["tokens"]
+        bucket["tokens"] = 0
+
+
+async def release_expired_leases(release_all: bool = False):
+    now_ms = int(time.time() * 1000)
+    for key, bucket in list(local_buckets.items()):
+        if release_all or bucket["expires_at"] <= now_ms:
+            _release(local_buckets.pop(key))
+
+    refunds = list(pending_refunds.items())
+    pending_refunds.clear()
+    try:
+        for window_key, count in refunds:
+            await refund_script(keys=[window_key], args=[count])
+    except RedisError:
+        # Неповернені дозволи зникнуть разом із лічильником вікна
+        logger.warning("Redis недоступний, невикористані дозволи не повернуто")
+
+
+async def release_leases_periodically():
+    try:
+        while True:
+            await asyncio.sleep(RATE_LIMIT_LEASE_TTL)
+            await release_expired_leases()
+    finally:
+        # Під час зупинки воркера повертаються всі невикористані дозволи
+        await release_expired_leases(release_all=True)
+
+
+def parse_rate(rate: str):
+    times, seconds = rate.split("/")
+    return int(times), int(seconds)
+
+
+def client_ip(request: Request) -> str:
+    # X-Forwarded-For тут не читається: клієнт може підставити будь-яку адресу.
+    # За довіреним проксі (FORWARDED_ALLOW_IPS) uvicorn сам підміняє request.client
+    return request.client.host if request.client else "unknown"
+
+
+class RateLimit:
+    def __init__(self, name: str, rate: str):
+        self.name = name
+        self.times, self.seconds = parse_rate(rate)
+        self.window_ms = self.seconds * 1000
+        self.lease_size = max(1, self.times // RATE_LIMIT_LOCAL_FRACTION)
+
+    def _next_lease_size(self, bucket: Optional[dict], now_ms: int) -> int:
+        # Оренда подвоюється, лише якщо попередню вичерпано до кінця її строку (частий клієнт).
+        # Для рідких запитів дозволи беруться по одному і не простоюють у різних воркерах
+        if bucket is not None and bucket["lease"] > 0 and bucket["expires_at"] > now_ms:
+            return min(self.lease_size, bucket["lease"] * 2)
+        return 1
+
+    async def _acquire_from_redis(self, key: str, now_ms: int, lease: int):
+        window_index = now_ms // self.window_ms
+        keys = [f"{key}:{window_index}", f"{key}:{window_index - 1}"]
+        refunds = [pending_refunds.pop(window_key, 0) for window_key in keys]
+        try:
+            granted, used, reset_ms = await sliding_window_script(
+                keys=keys,
+                args=[now_ms, self.window_ms, self.times, lease, RATE_LIMIT_LOCAL_FRACTION, *refunds],
+            )
+        except RedisError:
+            for window_key, count in zip(keys, refunds):
+                if count:
+                    pending_refunds[window_key] = pending_refunds.get(window_key, 0) + count
+            raise
+        return keys[0], int(granted), int(used), int(reset_ms)
+
+    async def check(self, identity: str, response: Response):
+        if not RATE_LIMIT_ENABLED:
+            return
+
+        key = f"rl:{self.name}:{identity}"
+        now_ms = int(time.time() * 1000)
+        bucket = local_buckets.get(key)
+
+        if bucket is None or bucket["tokens"] <= 0 or bucket["expires_at"] <= now_ms:
+            lease = self._next_lease_size(bucket, now_ms)
+            if bucket is not None:
+                _release(local_buckets.pop(key))
+            try:
+                window_key, granted, used, reset_ms = await self._acquire_from_redis(key, now_ms, lease)
+            except RedisError:
+                logger.warning("Redis недоступний, обмеження частоти запитів пропущено")
+                return
+            # Відмову кешуємо ненадовго: у ковзному вікні дозволи звільняються поступово
+            expires_in = min(reset_ms, int(RATE_LIMIT_LEASE_TTL * 1000) if granted else 1000)
+            bucket = {
+                "tokens": granted,
+                "lease": granted,
+                "used": used - granted,
+                "window_key": window_key,
+                "reset_at": now_ms + reset_ms,
+                "expires_at": now_ms + expires_in,
+            }
+            # Паралельний запит міг уже взяти власну оренду - її залишок повертається
+            concurrent = local_buckets.get(key)
+            if concurrent is not None:
+                _release(concurrent)
+            local_buckets[key] = bucket
+
+        reset = max(0, math.ceil((bucket["reset_at"] - now_ms) / 1000))
+        if bucket["tokens"] <= 0:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Забагато запитів, спробуйте пізніше",
+                headers={
+                    "RateLimit-Limit": str(self.times),
+                    "RateLimit-Remaining": "0",
+                    "RateLimit-Reset": str(reset),
+                    "Retry-After": str(reset),
+                },
+            )
+
+        bucket["tokens"] -= 1
+        bucket["used"] += 1
+        response.headers["RateLimit-Limit"] = str(self.times)
+        response.headers["RateLimit-Remaining"] = str(max(0, self.times - bucket["used"]))
+        response.headers["RateLimit-Reset"] = str(reset)
+
+
+class IPRateLimit(RateLimit):
+    async def __call__(self, request: Request, response: Response):
+        await self.check(f"ip:{client_ip(request)}", response)
+
+
+class UserRateLimit(RateLimit):
+    async def __call__(self, response: Response, current_user: User = Depends(get_current_user)):
+        await self.check(f"user:{current_user.id}", response)
@@ -0,0 +1,10 @@
+import redis.asyncio as redis
+
+from app.config import REDIS_HOST, REDIS_PORT, REDIS_DB
+
+# Спільний клієнт Redis для обмежувача запитів та кешу
+redis_client = redis.from_url(f"redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}")
+
+
+async def close_redis():
+    await redis_client.aclose()
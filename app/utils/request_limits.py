@@ -0,0 +1,48 @@
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+
+
+def payload_too_large(max_bytes: int) -> str:
+    return f"Запит завеликий, максимум {max_bytes} байт"
+
+
+class RequestBodyLimitMiddleware:
+    # Чистий ASGI middleware: обмежує розмір тіла запиту для заданих шляхів ще до розбору форми.
+    # Starlette записує файлову частину multipart повністю у тимчасовий файл, тому перевірка
+    # в ендпоінті спрацювала б лише після отримання всього завантаження
+    def __init__(self, app, limits: dict):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        max_bytes = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if max_bytes is None:
+            await self.app(scope, receive, send)
+            return
+
+        # Заявлений розмір перевіряється одразу, тіло в такому разі не читається зовсім
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > max_bytes:
+            response = JSONResponse(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                content={"detail": payload_too_large(max_bytes)},
+            )
+            await response(scope, receive, send)
+            return
+
+        # Без Content-Length (chunked) отримані байти рахуються по мірі надходження
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=payload_too_large(max_bytes),
+                    )
+            return message
+
+        await self.app(scope, limited_receive, send)
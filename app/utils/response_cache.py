@@ -0,0 +1,79 @@
+import hashlib
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import Request, Response
+from redis.exceptions import RedisError
+
+from app.config import CONTACT_RESPONSE_CACHE_ENABLED, CONTACT_RESPONSE_CACHE_TTL
+from app.utils.redis_client import redis_client
+
+# Заголовки відповіді, які зберігаються разом з тілом
+CACHED_HEADERS = ("etag", "cache-control", "x-next-cursor")
+
+
+def contacts_generation_key(user_id: int) -> str:
+    return f"contacts:gen:{user_id}"
+
+
+def seconds_until_local_midnight(now: Optional[datetime] = None) -> int:
+    now = now or datetime.now()
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    return max(1, int((midnight - now).total_seconds()))
+
+
+class ContactResponseCache:
+    # Кешовані сторінки прив'язані до покоління контактів користувача: будь-яка зміна
+    # збільшує лічильник, і всі попередні записи стають недосяжними та зникають за TTL
+    def __init__(self, user_id: int, name: str, request: Request, scope: str = ""):
+        self.user_id = user_id
+        self.name = name
+        params = "&".join(f"{key}={value}" for key, value in sorted(request.query_params.multi_items()))
+        self.params_digest = hashlib.sha256(f"{scope}|{params}".encode()).hexdigest()[:32]
+        self.key = None
+
+    async def get(self) -> Optional[dict]:
+        if not CONTACT_RESPONSE_CACHE_ENABLED:
+            return None
+        try:
+            generation = await redis_client.get(contacts_generation_key(self.user_id))
+            self.key = f"contacts:resp:{self.user_id}:{int(generation or 0)}:{self.name}:{self.params_digest}"
+            cached = await redis_client.hgetall(self.key)
+        except RedisError:
+            self.key = None
+            return None
+        if not cached:
+            return None
+        headers = {key.decode(): value.decode() for key, value in cached.items() if key != b"body"}
+        return {"body": cached[b"body"], "headers": headers}
+
+    async def store(self, response: Response, ttl: int = CONTACT_RESPONSE_CACHE_TTL) -> Response:
+        if self.key is None:
+            return response
+        mapping = {"body": response.body}
+        mapping.update({name: response.headers[name] for name in CACHED_HEADERS if name in response.headers})
+        try:
+            async with redis_client.pipeline(transaction=True) as pipe:
+                pipe.hset(self.key, mapping=mapping)
+                pipe.expire(self.key, ttl)
+                await pipe.execute()
+        except RedisError:
+            pass
+        return response
+
+
+async def get_contacts_generations(user_ids) -> dict:
+    if not user_ids:
+        return {}
+    values = await redis_client.mget([contacts_generation_key(user_id) for user_id in user_ids])
+    return {user_id: int(value or 0) for user_id, value in zip(user_ids, values)}
+
+
+async def bump_contacts_generation(user_id: int):
+    # Викликається після коміту змін, тож нове покоління завжди бачить свіжі дані.
+    # Лічильник збільшується і при вимкненому кеші відповідей: за ним перевіряється
+    # актуальність щоденного дайджесту днів народження
+    try:
+        await redis_client.incr(contacts_generation_key(user_id))
+    except RedisError:
+        pass
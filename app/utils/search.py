@@ -0,0 +1,27 @@
+from sqlalchemy import case, func, or_
+
+from app.models.contact import Contact
+
+SEARCH_FIELDS = (Contact.first_name, Contact.last_name, Contact.email)
+
+
+def contact_search_condition(q: str):
+    return or_(*(field.icontains(q, autoescape=True) for field in SEARCH_FIELDS))
+
+
+def contact_search_rank(q: str, dialect_name: str):
+    if dialect_name == "postgresql":
+        # word_similarity з pg_trgm: 1.0 для точного збігу слова, менше для часткового
+        return func.greatest(*(func.word_similarity(q, field) for field in SEARCH_FIELDS))
+
+    # Запасний варіант без pg_trgm (SQLite): точний збіг > префікс > підрядок
+    ranks = [
+        case(
+            (func.lower(field) == q.lower(), 3),
+            (field.istartswith(q, autoescape=True), 2),
+            (field.icontains(q, autoescape=True), 1),
+            else_=0,
+        )
+        for field in SEARCH_FIELDS
+    ]
+    return func.max(*ranks)
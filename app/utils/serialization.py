@@ -0,0 +1,30 @@
+from typing import Optional
+
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+
+from app.schemas.contact import ContactResponse
+
+CONTACT_FIELDS = tuple(ContactResponse.model_fields)
+
+
+def contact_to_dict(contact) -> dict:
+    return {field: getattr(contact, field) for field in CONTACT_FIELDS}
+
+
+def contacts_to_dicts(contacts) -> list:
+    return [contact_to_dict(contact) for contact in contacts]
+
+
+def fast_json_response(content, response: Optional[Response] = None) -> ORJSONResponse:
+    # Відповідь, повернена напряму, оминає повторну валідацію через response_model.
+    # Заголовки, встановлені залежностями та ендпоінтом (ETag, X-Next-Cursor, RateLimit-*),
+    # переносяться з підставленого FastAPI об'єкта Response
+    return ORJSONResponse(content, headers=dict(response.headers) if response is not None else None)
+
+
+def cached_json_response(body: bytes, headers: dict, response: Optional[Response] = None) -> Response:
+    # Готове тіло з кешу віддається без повторної серіалізації
+    merged = dict(response.headers) if response is not None else {}
+    merged.update(headers)
+    return Response(content=body, media_type="application/json", headers=merged)
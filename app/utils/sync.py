@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, func, insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import CONTACT_SYNC_LAG_SECONDS, CONTACT_TOMBSTONE_RETENTION_DAYS
+from app.models.contact import Contact, ContactTombstone
+from app.utils.pagination import encode_cursor, decode_cursor
+
+
+def encode_sync_token(moment: datetime, contact_id: int) -> str:
+    return encode_cursor((moment.replace(tzinfo=None).isoformat(), contact_id))
+
+
+def decode_sync_token(token: str):
+    moment, contact_id = decode_cursor(token, 2)
+    try:
+        return datetime.fromisoformat(moment).replace(tzinfo=None), int(contact_id)
+    except (TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Недійсний токен синхронізації"
+        )
+
+
+async def record_contact_deletions(db: AsyncSession, user_id: int, contact_ids):
+    # Надгробки вставляються одним INSERT ... SELECT перед видаленням контактів
+    await db.execute(
+        insert(ContactTombstone).from_select(
+            ["contact_id", "user_id"],
+            select(Contact.id, Contact.user_id).where(Contact.user_id == user_id, Contact.id.in_(contact_ids)),
+        )
+    )
+
+
+async def prune_contact_tombstones(db: AsyncSession):
+    cutoff = datetime.now() - timedelta(days=CONTACT_TOMBSTONE_RETENTION_DAYS)
+    await db.execute(delete(ContactTombstone).where(ContactTombstone.deleted_at < cutoff))
+    await db.commit()
+
+
+def database_clock(dialect_name: str):
+    # updated_at - це timestamp без часового поясу, заповнений через now() у часовому поясі сесії.
+    # У Postgres now() повертає timestamptz (asyncpg віддає aware datetime), тому порівнюємо
+    # з LOCALTIMESTAMP - тим самим годинником без часового поясу
+    if dialect_name == "postgresql":
+        return func.localtimestamp()
+    return func.now()
+
+
+async def get_contact_changes(db: AsyncSession, user_id: int, since, limit: int):
+    now = (await db.execute(select(database_clock(db.bind.dialect.name)))).scalar_one()
+    if isinstance(now, str):
+        now = datetime.fromisoformat(now)
+
+    since_at, since_id = decode_sync_token(since) if since else (datetime.min, 0)
+    if since and since_at < now - timedelta(days=CONTACT_TOMBSTONE_RETENTION_DAYS):
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Токен синхронізації застарів, потрібна повна синхронізація"
+        )
+
+    # Зміни та видалення - один потік, упорядкований за (мітка часу, id контакту):
+    # з кожного джерела береться не більше limit + 1 записів, тож сторінка обмежена
+    # незалежно від того, скільки видалень накопичилось за час відсутності клієнта
+    result = await db.execute(
+        select(Contact)
+        .where(
+            Contact.user_id == user_id,
+            tuple_(Contact.updated_at, Contact.id) > tuple_(since_at, since_id),
+        )
+        .order_by(Contact.updated_at, Contact.id)
+        .limit(limit + 1)
+    )
+    stream = [((contact.updated_at, contact.id), contact) for contact in result.scalars().all()]
+
+    if since:
+        result = await db.execute(
+            select(ContactTombstone.deleted_at, ContactTombstone.contact_id)
+            .where(
+                ContactTombstone.user_id == user_id,
+                tuple_(ContactTombstone.deleted_at, ContactTombstone.contact_id) > tuple_(since_at, since_id),
+            )
+            .order_by(ContactTombstone.deleted_at, ContactTombstone.contact_id)
+            .limit(limit + 1)
+        )
+        stream.extend(((deleted_at, contact_id), None) for deleted_at, contact_id in result.all())
+
+    stream.sort(key=lambda item: item[0])
+    has_more = len(stream) > limit
+    stream = stream[:limit]
+
+    changed = [contact for _, contact in stream if contact is not None]
+    deleted = list(dict.fromkeys(key[1] for key, contact in stream if contact is None))
+
+    if has_more:
+        next_token = stream[-1][0]
+    else:
+        # Транзакції, що ще не завершились, могли отримати мітку часу трохи раніше,
+        # тому наступний запит повторно охоплює останні CONTACT_SYNC_LAG_SECONDS секунд
+        next_token = max((now - timedelta(seconds=CONTACT_SYNC_LAG_SECONDS), 0), (since_at, since_id))
+
+    return changed, deleted, encode_sync_token(*next_token), has_more
@@ -0,0 +1,48 @@
+from pathlib import Path
+from typing import Optional
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+from app.config import APP_NAME, APP_BASE_URL, MAIL_DEFAULT_LOCALE
+
+EMAIL_TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "templates" / "email"
+EMAIL_LOCALES = tuple(sorted(path.name for path in EMAIL_TEMPLATES_DIR.iterdir() if path.is_dir()))
+
+
+def _create_environment(locale: str) -> Environment:
+    # Шаблон мови шукається спочатку в її каталозі, потім у спільному (base.html).
+    # auto_reload=False: скомпільовані шаблони не перевіряються на диску при кожному рендерингу
+    environment = Environment(
+        loader=FileSystemLoader([EMAIL_TEMPLATES_DIR / locale, EMAIL_TEMPLATES_DIR]),
+        autoescape=select_autoescape(["html"]),
+        auto_reload=False,
+        trim_blocks=True,
+        lstrip_blocks=True,
+    )
+    environment.globals.update(app_name=APP_NAME, base_url=APP_BASE_URL, locale=locale)
+    return environment
+
+
+email_environments = {locale: _create_environment(locale) for locale in EMAIL_LOCALES}
+
+
+def preload_email_templates():
+    # Компілює всі шаблони листів один раз під час старту
+    for locale, environment in email_environments.items():
+        for name in environment.list_templates(extensions=["html"]):
+            environment.get_template(name)
+
+
+def resolve_locale(accept_language: Optional[str]) -> str:
+    for part in (accept_language or "").split(","):
+        language = part.split(";")[0].strip().lower().split("-")[0]
+        if language in email_environments:
+            return language
+    return MAIL_DEFAULT_LOCALE
+
+
+def render_email(name: str, locale: str, **context):
+    environment = email_environments.get(locale) or email_environments[MAIL_DEFAULT_LOCALE]
+    template = environment.get_template(name)
+    subject = "".join(template.blocks["subject"](template.new_context(context))).strip()
+    return subject, template.render(context)
@@ -0,0 +1,90 @@
+import time
+import uuid
+from typing import Optional
+
+from redis.exceptions import RedisError
+
+from app.config import ACCESS_TOKEN_EXPIRE_MINUTES, REFRESH_TOKEN_EXPIRE_DAYS, TOKEN_DENYLIST_LOCAL_TTL
+from app.utils.cache import TTLCache
+from app.utils.redis_client import redis_client
+
+REFRESH_FAMILY_TTL = REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60
+
+# Атомарна заміна поточного refresh-токена сімейства: спрацьовує лише якщо
+# пред'явлений токен досі є поточним
+ROTATE_REFRESH_LUA = """
+local current = redis.call('GET', KEYS[1])
+if current ~= ARGV[1] then
+    return current and 0 or -1
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+rotate_refresh_script = redis_client.register_script(ROTATE_REFRESH_LUA)
+
+# Короткий локальний кеш результатів перевірки, щоб не ходити в Redis на кожен запит.
+# Відкликання в цьому процесі діє одразу, в інших - із затримкою до TOKEN_DENYLIST_LOCAL_TTL секунд
+denylist_local_cache = TTLCache(maxsize=10000, ttl=TOKEN_DENYLIST_LOCAL_TTL)
+
+
+def new_token_id() -> str:
+    return uuid.uuid4().hex
+
+
+def _denied_jti_key(jti: str) -> str:
+    return f"denylist:jti:{jti}"
+
+
+def _denied_family_key(family: str) -> str:
+    return f"denylist:fam:{family}"
+
+
+def _refresh_family_key(family: str) -> str:
+    return f"refresh:fam:{family}"
+
+
+async def is_token_revoked(jti: Optional[str], family: Optional[str]) -> bool:
+    cache_key = (jti, family)
+    cached = denylist_local_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    keys = [_denied_jti_key(jti) if jti else None, _denied_family_key(family) if family else None]
+    keys = [key for key in keys if key]
+    if not keys:
+        return False
+    try:
+        revoked = any(await redis_client.mget(keys))
+    except RedisError:
+        return False
+    denylist_local_cache.set(cache_key, revoked)
+    return revoked
+
+
+async def revoke_access_token(jti: str, expires_at: float):
+    ttl = max(1, int(expires_at - time.time()))
+    denylist_local_cache.clear()
+    await redis_client.set(_denied_jti_key(jti), 1, ex=ttl)
+
+
+async def start_refresh_family(family: str, jti: str):
+    await redis_client.set(_refresh_family_key(family), jti, ex=REFRESH_FAMILY_TTL)
+
+
+async def rotate_refresh_token(family: str, old_jti: str, new_jti: str) -> int:
+    # 1 - ротацію виконано, 0 - повторне використання старого токена, -1 - сімейство відкликане
+    return int(await rotate_refresh_script(
+        keys=[_refresh_family_key(family)],
+        args=[old_jti, new_jti, REFRESH_FAMILY_TTL],
+    ))
+
+
+async def revoke_refresh_family(family: str):
+    # Видалення сімейства робить недійсними його refresh-токени, а запис у denylist -
+    # усі access-токени, видані в межах сімейства, до завершення їхнього терміну дії
+    denylist_local_cache.clear()
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.delete(_refresh_family_key(family))
+        pipe.set(_denied_family_key(family), 1, ex=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+        await pipe.execute()
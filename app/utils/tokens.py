@@ -0,0 +1,64 @@
+import hashlib
+import time
+
+from jose import jwt
+from jose.constants import ALGORITHMS
+
+from app.config import SECRET_KEY, ALGORITHM, JWT_PRIVATE_KEY, JWT_PUBLIC_KEY, JWT_CACHE_SIZE, JWT_CACHE_TTL
+from app.utils.cache import TTLCache
+from app.utils.metrics import registry, CallbackMetric
+
+if ALGORITHM not in ALGORITHMS.SUPPORTED:
+    raise RuntimeError(f"Алгоритм JWT {ALGORITHM} не підтримується python-jose")
+
+if ALGORITHM in ALGORITHMS.HMAC:
+    signing_key = verifying_key = SECRET_KEY
+else:
+    if not JWT_PUBLIC_KEY:
+        raise RuntimeError(f"Для алгоритму {ALGORITHM} потрібен JWT_PUBLIC_KEY")
+    # Сервіс лише з публічним ключем може перевіряти токени, але не видавати їх
+    signing_key = JWT_PRIVATE_KEY
+    verifying_key = JWT_PUBLIC_KEY
+
+# Перевірені claims за дайджестом токена: повторні запити з тим самим токеном
+# не перевіряють підпис знову. Запис живе не довше, ніж сам токен (exp)
+verified_token_cache = TTLCache(maxsize=JWT_CACHE_SIZE, ttl=JWT_CACHE_TTL)
+token_cache_stats = {"hits": 0, "misses": 0}
+
+registry.register(CallbackMetric(
+    "jwt_cache_hits_total", "Перевірки JWT, обслужені з кешу", lambda: token_cache_stats["hits"], metric_type="counter",
+))
+registry.register(CallbackMetric(
+    "jwt_cache_misses_total", "Перевірки JWT з перевіркою підпису", lambda: token_cache_stats["misses"], metric_type="counter",
+))
+
+
+def encode_jwt(claims: dict) -> str:
+    if signing_key is None:
+        raise RuntimeError("JWT_PRIVATE_KEY не задано, сервіс не може видавати токени")
+    return jwt.encode(claims, signing_key, algorithm=ALGORITHM)
+
+
+def decode_jwt(token: str) -> dict:
+    digest = hashlib.sha256(token.encode()).digest()
+    claims = verified_token_cache.get(digest)
+    if claims is not None:
+        token_cache_stats["hits"] += 1
+        return dict(claims)
+
+    token_cache_stats["misses"] += 1
+    claims = jwt.decode(token, verifying_key, algorithms=[ALGORITHM])
+    ttl = JWT_CACHE_TTL
+    if "exp" in claims:
+        ttl = min(ttl, claims["exp"] - time.time())
+    if ttl > 0:
+        verified_token_cache.set(digest, claims, ttl=ttl)
+    return dict(claims)
+
+
+def get_token_cache_status():
+    return {
+        "size": len(verified_token_cache),
+        "max_size": verified_token_cache.maxsize,
+        **token_cache_stats,
+    }
@@ -0,0 +1,238 @@
+import asyncio
+import json
+import logging
+import signal
+import time
+from email.message import EmailMessage
+from email.utils import formataddr
+
+import aiosmtplib
+
+from app.config import (
+    MAIL_USERNAME,
+    MAIL_PASSWORD,
+    MAIL_FROM,
+    MAIL_FROM_NAME,
+    MAIL_PORT,
+    MAIL_SERVER,
+    MAIL_STARTTLS,
+    MAIL_SSL_TLS,
+    USE_CREDENTIALS,
+    VALIDATE_CERTS,
+    MAIL_QUEUE_BATCH_SIZE,
+    MAIL_QUEUE_MAX_ATTEMPTS,
+    MAIL_QUEUE_BACKOFF_SECONDS,
+    MAIL_QUEUE_POLL_TIMEOUT,
+    MAIL_WORKER_ID,
+    MAIL_WORKER_HEARTBEAT_TTL,
+)
+from app.utils.mail_queue import MAIL_OUTBOX_KEY, MAIL_RETRY_KEY, MAIL_DEAD_KEY, MAIL_WORKERS_KEY
+from app.utils.mail_queue import mail_processing_key, mail_worker_heartbeat_key
+from app.utils.redis_client import redis_client
+
+logger = logging.getLogger("mail_worker")
+
+# Помилки з'єднання, після яких SMTP-з'єднання відкривається заново
+SMTP_CONNECTION_ERRORS = (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPConnectError, ConnectionError, OSError)
+
+
+class MailWorker:
+    def __init__(
+            self,
+            redis,
+            hostname: str = MAIL_SERVER,
+            port: int = MAIL_PORT,
+            username: str = MAIL_USERNAME,
+            password: str = MAIL_PASSWORD,
+            sender: str = MAIL_FROM,
+            sender_name: str = MAIL_FROM_NAME,
+            use_tls: bool = MAIL_SSL_TLS,
+            start_tls: bool = MAIL_STARTTLS,
+            use_credentials: bool = USE_CREDENTIALS,
+            validate_certs: bool = VALIDATE_CERTS,
+            worker_id: str = MAIL_WORKER_ID,
+            batch_size: int = MAIL_QUEUE_BATCH_SIZE,
+            max_attempts: int = MAIL_QUEUE_MAX_ATTEMPTS,
+            backoff_seconds: int = MAIL_QUEUE_BACKOFF_SECONDS,
+            poll_timeout: int = MAIL_QUEUE_POLL_TIMEOUT,
+            heartbeat_ttl: int = MAIL_WORKER_HEARTBEAT_TTL,
+    ):
+        self.redis = redis
+        self.username = username
+        self.password = password
+        self.use_credentials = use_credentials
+        self.sender = formataddr((sender_name, sender)) if sender_name else sender
+        self.worker_id = worker_id
+        self.processing_key = mail_processing_key(worker_id)
+        self.heartbeat_key = mail_worker_heartbeat_key(worker_id)
+        self.heartbeat_ttl = heartbeat_ttl
+        self._next_reclaim_at = 0.0
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.poll_timeout = poll_timeout
+        self.smtp = aiosmtplib.SMTP(
+            hostname=hostname,
+            port=port,
+            use_tls=use_tls,
+            start_tls=start_tls,
+            validate_certs=validate_certs,
+        )
+        self._stopped = asyncio.Event()
+
+    def stop(self):
+        self._stopped.set()
+
+    async def _ensure_connected(self):
+        if self.smtp.is_connected:
+            return
+        try:
+            await self.smtp.connect()
+            if self.use_credentials and self.username:
+                await self.smtp.login(self.username, self.password)
+        except Exception:
+            # Напіввідкрите з'єднання (наприклад, після невдалого входу) не використовується повторно
+            self.smtp.close()
+            raise
+
+    async def _send(self, email: EmailMessage):
+        reused = self.smtp.is_connected
+        await self._ensure_connected()
+        try:
+            await self.smtp.send_message(email)
+        except (aiosmtplib.SMTPServerDisconnected, ConnectionError):
+            if not reused:
+                raise
+            # Сервер закрив з'єднання, що простоювало між пакетами: одна повторна
+            # спроба через нове з'єднання не рахується як невдала спроба листа
+            self.smtp.close()
+            await self._ensure_connected()
+            await self.smtp.send_message(email)
+
+    async def close(self):
+        if self.smtp.is_connected:
+            try:
+                await self.smtp.quit()
+            except aiosmtplib.SMTPException:
+                self.smtp.close()
+
+    def _build_email(self, message: dict) -> EmailMessage:
+        email = EmailMessage()
+        email["From"] = self.sender
+        email["To"] = ", ".join(message["recipients"])
+        email["Subject"] = message["subject"]
+        email.set_content(message["html"], subtype="html")
+        return email
+
+    async def _requeue(self, processing_key: str):
+        while await self.redis.lmove(processing_key, MAIL_OUTBOX_KEY, "RIGHT", "RIGHT"):
+            pass
+
+    async def heartbeat(self):
+        await self.redis.set(self.heartbeat_key, 1, ex=self.heartbeat_ttl)
+
+    async def recover(self):
+        # Повертає в чергу листи, які цей воркер не встиг обробити до зупинки
+        await self.heartbeat()
+        await self.redis.sadd(MAIL_WORKERS_KEY, self.worker_id)
+        await self._requeue(self.processing_key)
+        await self.reclaim_orphaned()
+
+    async def reclaim_orphaned(self):
+        # Листи воркерів, чий пульс зник (процес аварійно зупинився), повертаються в чергу.
+        # Списки живих воркерів не чіпаються, тож листи в обробці не надсилаються двічі
+        for raw_id in await self.redis.smembers(MAIL_WORKERS_KEY):
+            worker_id = raw_id.decode() if isinstance(raw_id, bytes) else raw_id
+            if worker_id == self.worker_id or await self.redis.exists(mail_worker_heartbeat_key(worker_id)):
+                continue
+            await self._requeue(mail_processing_key(worker_id))
+            await self.redis.srem(MAIL_WORKERS_KEY, worker_id)
+        self._next_reclaim_at = time.monotonic() + self.heartbeat_ttl
+
+    async def unregister(self):
+        # Після штатної зупинки список в обробці порожній: пакет завершується до виходу з циклу
+        await self._requeue(self.processing_key)
+        await self.redis.srem(MAIL_WORKERS_KEY, self.worker_id)
+        await self.redis.delete(self.heartbeat_key)
+
+    async def promote_due_retries(self):
+        due = await self.redis.zrangebyscore(MAIL_RETRY_KEY, "-inf", time.time(), start=0, num=self.batch_size)
+        for raw in due:
+            # ZREM повертає 1 лише одному з воркерів, тож лист не дублюється
+            if await self.redis.zrem(MAIL_RETRY_KEY, raw):
+                await self.redis.lpush(MAIL_OUTBOX_KEY, raw)
+
+    async def fetch_batch(self) -> list:
+        first = await self.redis.blmove(MAIL_OUTBOX_KEY, self.processing_key, self.poll_timeout, "RIGHT", "LEFT")
+        if first is None:
+            return []
+        batch = [first]
+        while len(batch) < self.batch_size:
+            raw = await self.redis.lmove(MAIL_OUTBOX_KEY, self.processing_key, "RIGHT", "LEFT")
+            if raw is None:
+                break
+            batch.append(raw)
+        return batch
+
+    async def _fail(self, raw, message: dict, error: Exception):
+        message["attempts"] += 1
+        message["last_error"] = str(error)
+        if message["attempts"] >= self.max_attempts:
+            logger.error("Лист %s не надіслано після %s спроб: %s", message["id"], message["attempts"], error)
+            await self.redis.lpush(MAIL_DEAD_KEY, json.dumps(message))
+        else:
+            delay = self.backoff_seconds * 2 ** (message["attempts"] - 1)
+            logger.warning("Лист %s: спроба %s невдала, повтор через %s с", message["id"], message["attempts"], delay)
+            await self.redis.zadd(MAIL_RETRY_KEY, {json.dumps(message): time.time() + delay})
+        await self.redis.lrem(self.processing_key, 1, raw)
+
+    async def send_batch(self, batch: list):
+        # Усі листи пакета надсилаються через одне відкрите SMTP-з'єднання
+        for raw in batch:
+            # Пульс оновлюється під час довгого пакета, щоб інші воркери не забрали його листи
+            await self.heartbeat()
+            message = json.loads(raw)
+            try:
+                await self._send(self._build_email(message))
+            except SMTP_CONNECTION_ERRORS as e:
+                self.smtp.close()
+                await self._fail(raw, message, e)
+            except aiosmtplib.SMTPException as e:
+                await self._fail(raw, message, e)
+            else:
+                await self.redis.lrem(self.processing_key, 1, raw)
+
+    async def run_once(self) -> int:
+        await self.heartbeat()
+        if time.monotonic() >= self._next_reclaim_at:
+            await self.reclaim_orphaned()
+        await self.promote_due_retries()
+        batch = await self.fetch_batch()
+        if batch:
+            await self.send_batch(batch)
+        return len(batch)
+
+    async def run(self):
+        await self.recover()
+        try:
+            while not self._stopped.is_set():
+                await self.run_once()
+            await self.unregister()
+        finally:
+            await self.close()
+
+
+async def main():
+    logging.basicConfig(level=logging.INFO)
+    worker = MailWorker(redis_client)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+    try:
+        await worker.run()
+    finally:
+        await redis_client.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,104 @@
+import argparse
+import asyncio
+import logging
+import signal
+from datetime import date, datetime, time, timedelta
+
+from app.config import BIRTHDAY_DIGEST_TIME
+from app.database.db import SessionLocal, engine
+from app.utils.birthday_digest import build_birthday_digests, birthday_digest_ready_key
+from app.utils.redis_client import redis_client
+from app.utils.sync import prune_contact_tombstones
+
+logger = logging.getLogger("scheduler")
+
+# Блокування на добу: якщо запущено кілька планувальників, щоденні задачі виконає лише один
+DAILY_LOCK_TTL = 6 * 60 * 60
+
+
+def parse_run_time(value: str) -> time:
+    hours, minutes = value.split(":")
+    return time(int(hours), int(minutes))
+
+
+def next_run_at(now: datetime, run_time: time) -> datetime:
+    run_at = datetime.combine(now.date(), run_time)
+    return run_at if run_at > now else run_at + timedelta(days=1)
+
+
+class Scheduler:
+    def __init__(self, redis, run_time: time = parse_run_time(BIRTHDAY_DIGEST_TIME)):
+        self.redis = redis
+        self.run_time = run_time
+        self._stopped = asyncio.Event()
+
+    def stop(self):
+        self._stopped.set()
+
+    async def run_daily_jobs(self, today: date, force: bool = False):
+        lock_key = f"scheduler:daily:{today.isoformat()}"
+        if not await self.redis.set(lock_key, 1, nx=True, ex=DAILY_LOCK_TTL) and not force:
+            logger.info("Щоденні задачі за %s вже виконує інший процес", today)
+            return
+
+        try:
+            async with SessionLocal() as db:
+                stats = await build_birthday_digests(db, today)
+                logger.info(
+                    "Дайджести днів народження за %s: користувачів %s, контактів %s, листів %s",
+                    today, stats["users"], stats["contacts"], stats["emails"],
+                )
+                await prune_contact_tombstones(db)
+                logger.info("Застарілі надгробки видалених контактів очищено")
+        except Exception:
+            # Знімаємо блокування, щоб задачі можна було повторити
+            await self.redis.delete(lock_key)
+            raise
+
+    async def _sleep_until(self, moment: datetime):
+        delay = max(0.0, (moment - datetime.now()).total_seconds())
+        try:
+            await asyncio.wait_for(self._stopped.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run_safely(self, today: date):
+        try:
+            await self.run_daily_jobs(today)
+        except Exception:
+            logger.exception("Помилка виконання щоденних задач")
+
+    async def run(self):
+        # Після перезапуску дайджест поточного дня розраховується одразу, якщо його ще немає
+        if not await self.redis.exists(birthday_digest_ready_key(date.today())):
+            await self._run_safely(date.today())
+
+        while not self._stopped.is_set():
+            await self._sleep_until(next_run_at(datetime.now(), self.run_time))
+            if self._stopped.is_set():
+                break
+            await self._run_safely(date.today())
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Планувальник щоденних задач Contacts API")
+    parser.add_argument("--once", action="store_true", help="Виконати задачі зараз і завершити роботу")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    scheduler = Scheduler(redis_client)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, scheduler.stop)
+    try:
+        if args.once:
+            await scheduler.run_daily_jobs(date.today(), force=True)
+        else:
+            await scheduler.run()
+    finally:
+        await redis_client.aclose()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,279 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+# Залежності бенчмарку: pip install -r requirements-dev.txt
+# Налаштування задаються до імпорту app. Бенчмарк очищає базу та Redis, тому DATABASE_URL
+# ігнорується: база задається лише через BENCH_DATABASE_URL (за замовчуванням - тимчасовий файл SQLite),
+# а Redis використовує окрему базу BENCH_REDIS_DB на REDIS_HOST/REDIS_PORT.
+# Обмеження частоти вимкнене, щоб вимірювати сам API, а не відмови 429; кеш відповідей зі
+# списками контактів вимкнений, щоб вимірювати запити до бази та серіалізацію, а не влучання в кеш.
+# Якщо Redis недоступний, кеші працюють у режимі fail-open
+DEFAULT_DATABASE_URL = f"sqlite+aiosqlite:///{Path(tempfile.gettempdir()) / 'contacts_bench.db'}"
+os.environ["DATABASE_URL"] = os.environ.get("BENCH_DATABASE_URL", DEFAULT_DATABASE_URL)
+os.environ["REDIS_DB"] = os.environ.get("BENCH_REDIS_DB", "15")
+os.environ["CONTACT_RESPONSE_CACHE_ENABLED"] = "false"
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("METRICS_ENABLED", "false")
+os.environ.setdefault("AVATAR_STORAGE", "local")
+for name, value in {"MAIL_USERNAME": "bench", "MAIL_PASSWORD": "bench", "MAIL_FROM": "bench@example.com", "MAIL_SERVER": "localhost"}.items():
+    os.environ.setdefault(name, value)
+
+import httpx  # noqa: E402
+from redis.exceptions import RedisError  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from app.config import CONTACT_RESPONSE_CACHE_ENABLED  # noqa: E402
+from app.database.db import Base, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.contact import Contact, birthday_month_day  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.utils.auth import create_access_token, pwd_context  # noqa: E402
+from app.utils.redis_client import redis_client  # noqa: E402
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+PASSWORD = "Bench-Passw0rd!"
+FIRST_NAMES = ("Олена", "Андрій", "Марія", "Іван", "Софія", "Петро", "Anna", "John", "Kateryna", "Taras")
+LAST_NAMES = ("Шевченко", "Коваленко", "Бондаренко", "Ткаченко", "Kravets", "Smith", "Melnyk", "Boyko", "Lysenko")
+
+
+def user_email(index: int) -> str:
+    return f"user{index}@bench.example.com"
+
+
+async def seed(users: int, contacts_per_user: int, seed_value: int):
+    rng = random.Random(seed_value)
+    # Лічильники поколінь і кешовані відповіді попередніх запусків не мають перетинатися з новими даними
+    try:
+        await redis_client.flushdb()
+    except RedisError:
+        pass
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+        password_hash = pwd_context.hash(PASSWORD)
+        await conn.execute(insert(User), [
+            {"username": f"user{i}", "email": user_email(i), "password": password_hash, "confirmed": True}
+            for i in range(users)
+        ])
+
+        for user_id in range(1, users + 1):
+            rows = []
+            for i in range(contacts_per_user):
+                birthday = date(1970 + rng.randrange(40), 1, 1) + timedelta(days=rng.randrange(365))
+                rows.append({
+                    "user_id": user_id,
+                    "first_name": rng.choice(FIRST_NAMES),
+                    "last_name": rng.choice(LAST_NAMES),
+                    "email": f"contact{user_id}_{i}@example.com",
+                    "phone_number": f"+38050{rng.randrange(10 ** 7):07d}",
+                    "birthday": birthday,
+                    "birthday_md": birthday_month_day(birthday),
+                    "additional_data": None,
+                })
+            await conn.execute(insert(Contact), rows)
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_scenario(client, scenario, requests: int, concurrency: int, users: int):
+    latencies = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for n in counter:
+            user_index = n % users
+            start = time.perf_counter()
+            response = await scenario["call"](client, user_index)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != scenario["status"]:
+                errors += 1
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started_at
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def combine_rounds(rounds: list) -> dict:
+    # Медіана за кілька повторів: поодинокий сплеск (GC, контрольна точка WAL) не зсуває p99
+    return {
+        "requests": sum(r["requests"] for r in rounds),
+        "errors": sum(r["errors"] for r in rounds),
+        **{key: statistics.median(r[key] for r in rounds) for key in ("rps", "p50_ms", "p99_ms")},
+    }
+
+
+def build_scenarios(tokens: list) -> dict:
+    def auth(user_index: int) -> dict:
+        return {"Authorization": f"Bearer {tokens[user_index]}"}
+
+    created = iter(range(10 ** 9))
+
+    return {
+        "get_contacts": {
+            "status": 200,
+            "call": lambda c, u: c.get("/api/v1/contacts/", params={"limit": 100}, headers=auth(u)),
+        },
+        "get_contacts_filtered": {
+            "status": 200,
+            "call": lambda c, u: c.get("/api/v1/contacts/", params={"last_name": "ко", "limit": 100}, headers=auth(u)),
+        },
+        "search_contacts": {
+            "status": 200,
+            "call": lambda c, u: c.get("/api/v1/contacts/", params={"q": "олена", "limit": 20}, headers=auth(u)),
+        },
+        "upcoming_birthdays": {
+            "status": 200,
+            "call": lambda c, u: c.get("/api/v1/contacts/birthdays/", params={"days": 7}, headers=auth(u)),
+        },
+        "create_contact": {
+            "status": 201,
+            "call": lambda c, u: c.post("/api/v1/contacts/", headers=auth(u), json={
+                "first_name": "Новий",
+                "last_name": "Контакт",
+                "email": f"new{next(created)}@example.com",
+                "phone_number": "+380501234567",
+                "birthday": "1990-05-17",
+            }),
+        },
+        "users_me": {
+            "status": 200,
+            "call": lambda c, u: c.get("/api/v1/users/me", headers=auth(u)),
+        },
+        # Обмежено bcrypt: кількість запитів береться окремо (--login-requests)
+        "login": {
+            "status": 200,
+            "call": lambda c, u: c.post("/api/v1/auth/login", data={"username": user_email(u), "password": PASSWORD}),
+        },
+    }
+
+
+def compare_with_baseline(results: dict, baseline: dict, tolerance: float, slack_ms: float) -> list:
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get("scenarios", {}).get(name)
+        if expected is None:
+            regressions.append(f"{name}: немає базових значень")
+            continue
+        if result["rps"] < expected["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: rps {result['rps']} < {expected['rps']} (-{tolerance:.0%})")
+        # Для швидких ендпоінтів відносний допуск менший за шум таймера, тому є ще абсолютний запас
+        if result["p99_ms"] > max(expected["p99_ms"] * (1 + tolerance), expected["p99_ms"] + slack_ms):
+            regressions.append(f"{name}: p99 {result['p99_ms']} мс > {expected['p99_ms']} мс (+{tolerance:.0%}, +{slack_ms} мс)")
+    return regressions
+
+
+async def main(args) -> int:
+    print(f"Наповнення бази: {args.users} користувачів × {args.contacts} контактів ({os.environ['DATABASE_URL']})")
+    await seed(args.users, args.contacts, args.seed)
+
+    tokens = [create_access_token(data={"sub": user_email(i)}) for i in range(args.users)]
+    scenarios = build_scenarios(tokens)
+    selected = args.scenarios or list(scenarios)
+
+    try:
+        redis_available = bool(await redis_client.ping())
+    except RedisError:
+        redis_available = False
+    # Вхід створює сімейство refresh-токенів у Redis, тож без Redis цей сценарій не має сенсу
+    if not redis_available and "login" in selected:
+        print("Redis недоступний, сценарій login пропущено")
+        selected.remove("login")
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name in selected:
+                requests = args.login_requests if name == "login" else args.requests
+                # Прогрів: перші запити заповнюють кеші та пул з'єднань
+                await run_scenario(client, scenarios[name], min(requests, args.concurrency * 2), args.concurrency, args.users)
+                results[name] = combine_rounds([
+                    await run_scenario(client, scenarios[name], requests, args.concurrency, args.users)
+                    for _ in range(args.rounds)
+                ])
+                r = results[name]
+                print(f"{name:<24} {r['rps']:>9} rps  p50 {r['p50_ms']:>8} мс  p99 {r['p99_ms']:>8} мс  помилок {r['errors']}")
+    await engine.dispose()
+
+    failed = [name for name, r in results.items() if r["errors"]]
+    if failed:
+        print(f"Сценарії з неочікуваними статусами відповіді: {', '.join(failed)}")
+        return 1
+
+    meta = {
+        "users": args.users,
+        "contacts": args.contacts,
+        "concurrency": args.concurrency,
+        "rounds": args.rounds,
+        "database": engine.dialect.name,
+        "redis": redis_available,
+        "response_cache": CONTACT_RESPONSE_CACHE_ENABLED,
+        "python": ".".join(platform.python_version_tuple()[:2]),
+    }
+
+    if args.update_baseline:
+        BASELINE_PATH.write_text(json.dumps({"meta": meta, "scenarios": results}, indent=2, ensure_ascii=False) + "\n")
+        print(f"Базові значення збережено у {BASELINE_PATH}")
+        return 0
+
+    # Без порівнянних базових значень перевірка не вважається пройденою
+    if not BASELINE_PATH.exists():
+        print("Базових значень немає, запустіть з --update-baseline")
+        return 1
+
+    baseline = json.loads(BASELINE_PATH.read_text())
+    if baseline.get("meta", {}) != meta:
+        print(f"Параметри запуску {meta} відрізняються від базових {baseline.get('meta')}")
+        print("Запустіть з тими самими параметрами або оновіть базові значення (--update-baseline)")
+        return 1
+
+    regressions = compare_with_baseline(results, baseline, args.tolerance, args.p99_slack_ms)
+    for line in regressions:
+        print(f"РЕГРЕСІЯ {line}")
+    return 1 if regressions else 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Навантажувальний бенчмарк Contacts API (у процесі, через ASGI)")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--contacts", type=int, default=1000, help="Кількість контактів на користувача")
+    parser.add_argument("--requests", type=int, default=500, help="Кількість запитів на сценарій")
+    parser.add_argument("--login-requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=5, help="Кількість повторів сценарію, береться медіана")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Допустиме відхилення від базових значень")
+    parser.add_argument("--p99-slack-ms", type=float, default=5.0, help="Мінімальний допустимий приріст p99 у мілісекундах")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("scenarios", nargs="*", help="Сценарії для запуску (за замовчуванням усі)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
@@ -0,0 +1,87 @@
+import argparse
+import json
+import time
+from datetime import date, datetime
+from typing import List
+
+from fastapi.utils import create_model_field
+
+import app.models.user  # noqa: F401  (реєструє модель User для зв'язку Contact.user)
+from app.models.contact import Contact
+from app.schemas.contact import ContactInDB, ContactResponse
+from app.utils.serialization import contacts_to_dicts, fast_json_response
+
+PAGE_SIZES = (100, 1000, 10000)
+
+
+def make_contacts(count: int) -> list:
+    now = datetime.utcnow()
+    return [
+        Contact(
+            id=i,
+            user_id=1,
+            first_name=f"Ім'я{i}",
+            last_name=f"Прізвище{i}",
+            email=f"contact{i}@example.com",
+            phone_number="+380501234567",
+            birthday=date(1990, 1 + i % 12, 1 + i % 28),
+            additional_data=None if i % 2 else "нотатка",
+            created_at=now,
+            updated_at=now,
+        )
+        for i in range(count)
+    ]
+
+
+def response_model_serializer(model):
+    # Те саме, що робить FastAPI для response_model=List[...]: валідація, dump у JSON-сумісні типи, json.dumps
+    field = create_model_field(name="Response", type_=List[model], mode="serialization")
+
+    def serialize(contacts):
+        value, errors = field.validate(contacts, {}, loc=("response",))
+        assert not errors
+        content = field.serialize(value, mode="json")
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+    return serialize
+
+
+def fast_serializer(contacts):
+    return fast_json_response(contacts_to_dicts(contacts)).body
+
+
+def measure(serialize, contacts, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        serialize(contacts)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Порівняння серіалізації сторінок контактів")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--sizes", type=int, nargs="+", default=PAGE_SIZES)
+    args = parser.parse_args()
+
+    serializers = {
+        "response_model (ContactInDB)": response_model_serializer(ContactInDB),
+        "response_model (ContactResponse)": response_model_serializer(ContactResponse),
+        "orjson fast path": fast_serializer,
+    }
+
+    print(f"{'контактів':>10}  {'спосіб':<34} {'мс':>9} {'прискорення':>12}")
+    for size in args.sizes:
+        contacts = make_contacts(size)
+        reference = json.loads(fast_serializer(contacts))
+        baseline = None
+        for name, serialize in serializers.items():
+            assert json.loads(serialize(contacts)) == reference
+            elapsed = measure(serialize, contacts, args.repeat)
+            baseline = baseline or elapsed
+            print(f"{size:>10}  {name:<34} {elapsed:>9.2f} {baseline / elapsed:>11.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""columns and indexes for pagination, birthdays, search, ETags and delta sync
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:01
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRGM_COLUMNS = ("first_name", "last_name", "email")
+
+
+def upgrade() -> None:
+    is_postgres = op.get_bind().dialect.name == "postgresql"
+
+    with op.batch_alter_table("contacts") as batch_op:
+        batch_op.add_column(sa.Column("birthday_md", sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column("version", sa.Integer(), nullable=False, server_default="1"))
+
+    if is_postgres:
+        op.execute(
+            "UPDATE contacts SET birthday_md = "
+            "EXTRACT(MONTH FROM birthday)::int * 100 + EXTRACT(DAY FROM birthday)::int"
+        )
+    else:
+        op.execute(
+            "UPDATE contacts SET birthday_md = "
+            "CAST(strftime('%m', birthday) AS INTEGER) * 100 + CAST(strftime('%d', birthday) AS INTEGER)"
+        )
+
+    with op.batch_alter_table("contacts") as batch_op:
+        batch_op.alter_column("birthday_md", existing_type=sa.Integer(), nullable=False)
+
+    op.create_index("ix_contacts_user_name_id", "contacts", ["user_id", "last_name", "first_name", "id"])
+    op.create_index("ix_contacts_user_birthday_md", "contacts", ["user_id", "birthday_md"])
+    op.create_index("ix_contacts_user_updated_at", "contacts", ["user_id", "updated_at", "id"])
+
+    if is_postgres:
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for column in TRGM_COLUMNS:
+            op.create_index(
+                f"ix_contacts_{column}_trgm",
+                "contacts",
+                [column],
+                postgresql_using="gin",
+                postgresql_ops={column: "gin_trgm_ops"},
+            )
+
+    op.create_table(
+        "contact_tombstones",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("contact_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_contact_tombstones_user_deleted_at", "contact_tombstones", ["user_id", "deleted_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_contact_tombstones_user_deleted_at", table_name="contact_tombstones")
+    op.drop_table("contact_tombstones")
+
+    if op.get_bind().dialect.name == "postgresql":
+        for column in TRGM_COLUMNS:
+            op.drop_index(f"ix_contacts_{column}_trgm", table_name="contacts")
+
+    op.drop_index("ix_contacts_user_updated_at", table_name="contacts")
+    op.drop_index("ix_contacts_user_birthday_md", table_name="contacts")
+    op.drop_index("ix_contacts_user_name_id", table_name="contacts")
+
+    with op.batch_alter_table("contacts") as batch_op:
+        batch_op.drop_column("version")
+        batch_op.drop_column("birthday_md")
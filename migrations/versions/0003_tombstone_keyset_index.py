@@ -0,0 +1,31 @@
+"""keyset index for paging contact tombstones in delta sync
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 00:00:02
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_index("ix_contact_tombstones_user_deleted_at", table_name="contact_tombstones")
+    op.create_index(
+        "ix_contact_tombstones_user_deleted_at_contact",
+        "contact_tombstones",
+        ["user_id", "deleted_at", "contact_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_contact_tombstones_user_deleted_at_contact", table_name="contact_tombstones")
+    op.create_index("ix_contact_tombstones_user_deleted_at", "contact_tombstones", ["user_id", "deleted_at"])
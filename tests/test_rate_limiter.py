@@ -0,0 +1,100 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException, Response
+from redis.exceptions import RedisError
+
+from app.utils import rate_limiter
+from app.utils.redis_client import redis_client
+
+WINDOW_START = 1_700_000_040  # початок 60-секундного вікна
+
+
+def run(coro):
+    async def wrapper():
+        try:
+            return await coro
+        finally:
+            await redis_client.connection_pool.disconnect()
+    return asyncio.run(wrapper())
+
+
+@pytest.fixture(autouse=True)
+def redis_limiter(monkeypatch):
+    try:
+        run(redis_client.ping())
+    except (RedisError, OSError):
+        pytest.skip("Redis недоступний")
+    monkeypatch.setattr(rate_limiter, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(rate_limiter, "time", SimpleNamespace(time=lambda: WINDOW_START + 1))
+
+
+class Worker:
+    """Окремий процес сервера: власні локальні оренди дозволів."""
+
+    def __init__(self, monkeypatch):
+        self.monkeypatch = monkeypatch
+        self.buckets = {}
+        self.refunds = {}
+
+    def _activate(self):
+        self.monkeypatch.setattr(rate_limiter, "local_buckets", self.buckets)
+        self.monkeypatch.setattr(rate_limiter, "pending_refunds", self.refunds)
+
+    async def request(self, limit, identity) -> bool:
+        self._activate()
+        try:
+            await limit.check(identity, Response())
+        except HTTPException:
+            return False
+        return True
+
+    async def release_leases(self):
+        self._activate()
+        await rate_limiter.release_expired_leases(release_all=True)
+
+
+async def allowed_until_denied(workers, limit, identity) -> int:
+    allowed = 0
+    while await workers[allowed % len(workers)].request(limit, identity):
+        allowed += 1
+    return allowed
+
+
+def test_single_requests_on_many_workers_use_full_limit(monkeypatch):
+    limit = rate_limiter.RateLimit("test", "100/60")
+    identity = f"user:{uuid.uuid4()}"
+
+    async def scenario():
+        # Кожен запит потрапляє на новий воркер без оренди
+        allowed = 0
+        while await Worker(monkeypatch).request(limit, identity):
+            allowed += 1
+        return allowed
+
+    assert run(scenario()) == 100
+
+
+def test_unused_leases_are_returned(monkeypatch):
+    limit = rate_limiter.RateLimit("test", "100/60")
+    identity = f"user:{uuid.uuid4()}"
+    workers = [Worker(monkeypatch) for _ in range(4)]
+
+    async def scenario():
+        allowed = 0
+        for worker in workers:
+            # Частий клієнт на кожному воркері: оренди зростають до lease_size
+            for _ in range(8):
+                allowed += await worker.request(limit, identity)
+        outstanding = sum(bucket["tokens"] for w in workers for bucket in w.buckets.values())
+        # Після завершення оренд залишок дозволів знову доступний будь-якому воркеру
+        for worker in workers:
+            await worker.release_leases()
+        allowed += await allowed_until_denied(workers, limit, identity)
+        return outstanding, allowed
+
+    outstanding, allowed = run(scenario())
+    assert outstanding > 0
+    assert allowed == 100